@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from passlib.context import CryptContext
 
 """
 Flask server for BabyNames Hive (MySQL path)
@@ -14,32 +15,49 @@ Optional:
   ALLOWED_ORIGIN=http://localhost:5173  (CORS for /api/*)
 """
 
+import atexit
 import base64
+import concurrent.futures
+import functools
 import json
 import os
+import queue
 import re
 import secrets
 import smtplib
 import ssl
+import string
 import time
 import logging
+import mimetypes
+from logging.handlers import QueueHandler, QueueListener
+import threading
 import hashlib
+import orjson
+from decimal import Decimal
 from datetime import datetime, timedelta
 from email.message import EmailMessage
 from typing import Optional
 from uuid import uuid4
 
-from flask import Flask, request, jsonify, send_from_directory, g
-from flask_cors import CORS
+from flask import Flask, request, jsonify, send_from_directory, g, abort
+from flask.json.provider import JSONProvider
+from flask.logging import default_handler
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, DateTime, Text,
-    ForeignKey, UniqueConstraint, text as sql_text, func, inspect, Boolean
+    ForeignKey, UniqueConstraint, text as sql_text, func, inspect, Boolean, select, exists, Index,
+    literal, null, union_all, or_, update, event,
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session, relationship
+from sqlalchemy.orm import (
+    declarative_base, sessionmaker, scoped_session, relationship, selectinload, joinedload, contains_eager,
+)
+from sqlalchemy.dialects import mysql as mysql_dialect, sqlite as sqlite_dialect
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import OperationalError
 from dotenv import load_dotenv
 import certifi
+import click
 try:
     from sendgrid import SendGridAPIClient
     from sendgrid.helpers.mail import Mail, Content
@@ -50,7 +68,9 @@ except ImportError:  # pragma: no cover - optional dependency
 from google.oauth2 import id_token as google_id_token
 from google.auth.transport import requests as google_requests
 import requests as http_requests
-from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse
+import cachecontrol
+from cachetools import TTLCache
+from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse, quote
 
 # Load .env.local using an absolute path (more reliable than relative cwd)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -67,6 +87,24 @@ if not DATABASE_URL:
 GOOGLE_OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID")
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
 
+# One shared transport for token verification; CacheControl honours the
+# max-age Google sends with its signing certs, so warm logins skip the fetch.
+_GOOGLE_AUTH_REQUEST = google_requests.Request(
+    session=cachecontrol.CacheControl(http_requests.Session())
+)
+# Verified ID token claims keyed by SHA-256 of the token (never the raw token).
+# The short TTL keeps revocations effective while skipping RSA on repeat logins.
+_ID_TOKEN_CACHE = TTLCache(maxsize=10000, ttl=30)
+_ID_TOKEN_CACHE_LOCK = threading.Lock()
+# Reset-request responses keyed by email: repeats inside the cooldown replay
+# the first response (same still-valid token) without a DB write or email.
+_RESET_REQUEST_COOLDOWN = TTLCache(maxsize=10000, ttl=60)
+_RESET_REQUEST_COOLDOWN_LOCK = threading.Lock()
+# Name metadata rows are written once and never edited, so entries read from
+# the DB are cached per worker (audio clips stay in the DB; see _name_audio_url).
+_NAME_METADATA_CACHE = TTLCache(maxsize=10000, ttl=24 * 3600)
+_NAME_METADATA_CACHE_LOCK = threading.Lock()
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_TTS_MODEL = os.getenv("OPENAI_TTS_MODEL", "gpt-4o-mini-tts")
@@ -81,12 +119,19 @@ SMTP_USERNAME = os.getenv("SMTP_USERNAME")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() in {"1", "true", "yes"}
 SMTP_DEBUG = os.getenv("SMTP_DEBUG", "false").lower() in {"1", "true", "yes"}
+# Set to false on multi-worker deploys and run `flask --app app db-upgrade` once instead
+RUN_MIGRATIONS_ON_IMPORT = os.getenv("BND_RUN_MIGRATIONS", "true").lower() in {"1", "true", "yes"}
 PASSWORD_RESET_URL_BASE = os.getenv("PASSWORD_RESET_URL_BASE")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 
 SESSION_TOKEN_TTL_HOURS = int(os.getenv("SESSION_TOKEN_TTL_HOURS", "24"))
 MAX_SESSION_TOKENS_PER_USER = int(os.getenv("MAX_SESSION_TOKENS_PER_USER", "10"))
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "25"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "25"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 
 class AuthError(Exception):
     """Raised when authentication fails or credentials are missing."""
@@ -96,8 +141,73 @@ class AuthError(Exception):
 # ----------------------------------------------------------------------------
 
 DIST_DIR = os.path.join(os.path.dirname(__file__), "dist")
-app = Flask(__name__, static_folder="dist", static_url_path="/")
+
+
+def _list_dist_files(root: str) -> frozenset:
+    """Relative ("/"-separated) paths of every file in the built SPA."""
+    files = set()
+    for dirpath, _dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        for filename in filenames:
+            rel = filename if rel_dir == "." else os.path.join(rel_dir, filename)
+            files.add(rel.replace(os.sep, "/"))
+    return frozenset(files)
+
+
+# the build is baked in at deploy time, so index it once instead of stat-ing per request
+_DIST_FILES = _list_dist_files(DIST_DIR)
+# index.html is the fallback for every client route; serve it from memory
+_INDEX_HTML = None
+_INDEX_ETAG = None
+if "index.html" in _DIST_FILES:
+    with open(os.path.join(DIST_DIR, "index.html"), "rb") as index_file:
+        _INDEX_HTML = index_file.read()
+    _INDEX_ETAG = hashlib.sha256(_INDEX_HTML).hexdigest()[:32]
+# precompressed siblings (e.g. from vite-plugin-compression), best first
+_PRECOMPRESSED_VARIANTS = ((".br", "br"), (".gz", "gzip"))
+# Vite content-hashes everything it emits under assets/
+_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_ORJSON_OPTIONS = (
+    orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_OMIT_MICROSECONDS | orjson.OPT_NON_STR_KEYS
+)
+
+
+def _orjson_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """Serve jsonify() and dict returns through orjson.
+
+    Naive datetimes serialize exactly like _isoformat().
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype="application/json")
+
+
+# dist/ is served by spa() below, which also falls back to index.html for client routes
+app = Flask(__name__, static_folder=None)
+app.json = OrjsonProvider(app)
 app.logger.setLevel(logging.INFO)
+# Handlers only enqueue records; a listener thread does the blocking stderr
+# writes so error paths never stall a request on I/O.
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, default_handler, respect_handler_level=True)
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(QueueHandler(_log_queue))
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 
 @app.errorhandler(AuthError)
@@ -111,6 +221,25 @@ def test_api():
     return {"message": "Flask backend is working!"}, 200
 
 
+@app.route("/api/names/<path:name_key>/audio", methods=["GET"])
+def api_name_audio(name_key):
+    db = get_db()
+    row = db.execute(
+        select(NameMetadata.audio_base64, NameMetadata.audio_mime)
+        .where(NameMetadata.name_key == _normalize_name_key(name_key))
+    ).first()
+    if not row or not row.audio_base64:
+        return jsonify({"ok": False, "error": "Audio not found"}), 404
+    try:
+        audio = base64.b64decode(row.audio_base64)
+    except (ValueError, TypeError):
+        return jsonify({"ok": False, "error": "Audio not found"}), 404
+    response = app.response_class(audio, mimetype=row.audio_mime or "audio/mpeg")
+    # clips are generated once per name and never rewritten
+    response.headers["Cache-Control"] = "public, max-age=604800"
+    return response
+
+
 @app.route("/api/invite-info", methods=["GET"])
 def api_invite_info():
     token = (request.args.get("token") or "").strip()
@@ -118,33 +247,45 @@ def api_invite_info():
     if not token:
         return jsonify({"ok": False, "error": "token query param required"}), 400
 
-    db = SessionLocal()
-    try:
-        invite_query = db.query(SessionInvite).filter(SessionInvite.token == token)
-        if sid:
-            invite_query = invite_query.filter(SessionInvite.session_id == sid)
-        invite = invite_query.first()
-        if not invite:
-            return jsonify({"ok": False, "error": "Invite not found"}), 404
-
-        session = db.query(Session).filter_by(id=invite.session_id).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
+    db = get_db()
+    # invite and session columns in one round-trip; the outer join keeps
+    # "invite exists but session is gone" distinguishable
+    invite_query = (
+        select(
+            SessionInvite.session_id,
+            SessionInvite.token,
+            SessionInvite.email,
+            Session.id.label("sid"),
+            Session.title,
+            Session.max_names,
+            Session.name_focus,
+            Session.created_by,
+            Session.invites_locked,
+            Session.template_ready,
+        )
+        .outerjoin(Session, Session.id == SessionInvite.session_id)
+        .where(SessionInvite.token == token)
+    )
+    if sid:
+        invite_query = invite_query.where(SessionInvite.session_id == sid)
+    row = db.execute(invite_query.limit(1)).first()
+    if not row:
+        return jsonify({"ok": False, "error": "Invite not found"}), 404
+    if row.sid is None:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
 
-        payload = {
-            "sid": session.id,
-            "token": invite.token,
-            "email": invite.email,
-            "title": session.title,
-            "requiredNames": session.max_names or 10,
-            "nameFocus": session.name_focus or "mix",
-            "createdBy": session.created_by,
-            "invitesLocked": bool(session.invites_locked),
-            "templateReady": bool(session.template_ready),
-        }
-        return jsonify({"ok": True, "invite": payload})
-    finally:
-        db.close()
+    payload = {
+        "sid": row.sid,
+        "token": row.token,
+        "email": row.email,
+        "title": row.title,
+        "requiredNames": row.max_names or 10,
+        "nameFocus": row.name_focus or "mix",
+        "createdBy": row.created_by,
+        "invitesLocked": bool(row.invites_locked),
+        "templateReady": bool(row.template_ready),
+    }
+    return jsonify({"ok": True, "invite": payload})
 
 raw_origins = os.getenv("ALLOWED_ORIGIN", "*")
 if raw_origins.strip() == "*":
@@ -152,18 +293,106 @@ if raw_origins.strip() == "*":
 else:
     allowed_origins = [origin.strip() for origin in raw_origins.split(",") if origin.strip()]
 
-CORS(app, resources={r"/api/*": {"origins": allowed_origins}})
+# CORS for /api/* from precomputed headers: preflights are answered before
+# dispatch and actual responses only get the allow-origin header injected.
+_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Methods": "GET, POST, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type",
+    "Access-Control-Max-Age": "86400",
+}
+_CORS_ORIGINS = None if allowed_origins == "*" else frozenset(allowed_origins)
+
+
+def _cors_headers(origin: Optional[str]) -> Optional[dict]:
+    if _CORS_ORIGINS is None:
+        return {"Access-Control-Allow-Origin": "*"}
+    if origin in _CORS_ORIGINS:
+        return {"Access-Control-Allow-Origin": origin, "Vary": "Origin"}
+    return None
+
+
+@app.before_request
+def _answer_cors_preflight():
+    if request.method != "OPTIONS" or not request.path.startswith("/api/"):
+        return None
+    headers = _cors_headers(request.headers.get("Origin"))
+    if headers is None:
+        return None
+    return "", 204, {**_PREFLIGHT_HEADERS, **headers}
+
+
+@app.after_request
+def _add_cors_headers(response):
+    if request.path.startswith("/api/") and "Access-Control-Allow-Origin" not in response.headers:
+        headers = _cors_headers(request.headers.get("Origin"))
+        if headers:
+            response.headers["Access-Control-Allow-Origin"] = headers["Access-Control-Allow-Origin"]
+            if "Vary" in headers:
+                response.vary.add("Origin")
+    return response
 
 # ----------------------------------------------------------------------------
 # Database
 # ----------------------------------------------------------------------------
 
+engine_options = {}
+if make_url(DATABASE_URL).get_backend_name() != "sqlite":
+    # SQLite (tests) uses a single-connection pool that rejects these knobs
+    engine_options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+if make_url(DATABASE_URL).get_backend_name() == "mysql":
+    # server_default=CURRENT_TIMESTAMP must yield the same naive UTC as now_utc()
+    engine_options["connect_args"] = {"init_command": "SET time_zone = '+00:00'"}
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
     future=True,
+    query_cache_size=1200,
+    **engine_options,
 )
-SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False))
+_session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+SessionLocal = scoped_session(_session_factory)
+
+
+def _queue_insert(db, statement, row: dict):
+    """Buffer an append-only row; all buffered rows are written at commit."""
+    if not db.in_transaction():
+        db.begin()  # so a rollback before any SQL still discards the buffer
+    db.info.setdefault("pending_inserts", {}).setdefault(statement, []).append(row)
+
+
+@event.listens_for(_session_factory, "before_commit")
+def _write_pending_inserts(session):
+    pending = session.info.pop("pending_inserts", None)
+    if not pending:
+        return
+    # rows may reference parents (e.g. a new session) still pending in the ORM
+    session.flush()
+    for statement, rows in pending.items():
+        session.execute(statement, rows)
+
+
+@event.listens_for(_session_factory, "after_soft_rollback")
+def _drop_pending_inserts(session, previous_transaction):
+    session.info.pop("pending_inserts", None)
+
+
+def get_db():
+    """Return the request's database session, opening it on first use."""
+    db = g.get("db")
+    if db is None:
+        db = g.db = SessionLocal()
+    return db
+
+
+@app.teardown_appcontext
+def _remove_db_session(exc=None):
+    SessionLocal.remove()
 
 Base = declarative_base()
 
@@ -186,16 +415,69 @@ def ensure_schema(retries: int = 5, delay: float = 2.0):
                     conn.execute(sql_text('ALTER TABLE sessions ADD COLUMN template_ready INTEGER DEFAULT 0'))
                 if 'name_focus' not in session_cols:
                     conn.execute(sql_text("ALTER TABLE sessions ADD COLUMN name_focus VARCHAR(16) DEFAULT 'mix'"))
-                conn.execute(sql_text('UPDATE sessions SET max_names = 10 WHERE max_names IS NULL OR max_names < 5'))
-                conn.execute(sql_text('UPDATE sessions SET invites_locked = 0 WHERE invites_locked IS NULL'))
-                conn.execute(sql_text('UPDATE sessions SET template_ready = 0 WHERE template_ready IS NULL'))
-                conn.execute(sql_text("UPDATE sessions SET name_focus = 'mix' WHERE name_focus IS NULL OR name_focus = ''"))
+                # legacy-row backfill in one pass over sessions instead of four
+                conn.execute(sql_text(
+                    "UPDATE sessions SET "
+                    "max_names = CASE WHEN max_names IS NULL OR max_names < 5 THEN 10 ELSE max_names END, "
+                    "invites_locked = COALESCE(invites_locked, 0), "
+                    "template_ready = COALESCE(template_ready, 0), "
+                    "name_focus = CASE WHEN name_focus IS NULL OR name_focus = '' THEN 'mix' ELSE name_focus END "
+                    "WHERE max_names IS NULL OR max_names < 5 OR invites_locked IS NULL "
+                    "OR template_ready IS NULL OR name_focus IS NULL OR name_focus = ''"
+                ))
                 if 'tiebreak_active' not in session_cols:
                     conn.execute(sql_text('ALTER TABLE sessions ADD COLUMN tiebreak_active INTEGER DEFAULT 0'))
                 if 'tiebreak_names' not in session_cols:
                     conn.execute(sql_text('ALTER TABLE sessions ADD COLUMN tiebreak_names TEXT'))
                 if 'final_winners' not in session_cols:
                     conn.execute(sql_text('ALTER TABLE sessions ADD COLUMN final_winners TEXT'))
+                if 'owners_count' not in session_cols:
+                    conn.execute(sql_text('ALTER TABLE sessions ADD COLUMN owners_count INTEGER NOT NULL DEFAULT 1'))
+                    conn.execute(sql_text(
+                        "UPDATE sessions SET owners_count = (SELECT COUNT(*) FROM members "
+                        "WHERE members.session_id = sessions.id AND members.role = 'owner')"
+                    ))
+
+                if engine.dialect.name == 'mysql':
+                    member_cols = {col['name']: col for col in inspector.get_columns('members')}
+                    if member_cols.get('joined_at', {}).get('default') is None:
+                        conn.execute(sql_text('ALTER TABLE members MODIFY joined_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP'))
+                    score_cols = {col['name']: col for col in inspector.get_columns('scores')}
+                    if score_cols.get('created_at', {}).get('default') is None:
+                        conn.execute(sql_text('ALTER TABLE scores MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP'))
+
+                if engine.dialect.name == 'mysql' and inspector.has_table('reset_tokens'):
+                    reset_cols = {col['name']: col for col in inspector.get_columns('reset_tokens')}
+                    token_len = getattr(reset_cols.get('token', {}).get('type'), 'length', None)
+                    if token_len is not None and token_len < 64:
+                        # tokens are stored hashed now; outstanding plaintext ones can't match anyway
+                        conn.execute(sql_text('DELETE FROM reset_tokens'))
+                        conn.execute(sql_text('ALTER TABLE reset_tokens MODIFY token VARCHAR(64) NOT NULL'))
+
+                for table_name, index_name, columns in (
+                    ('members', 'ix_members_session_role', 'session_id, role'),
+                    ('members', 'ix_members_uid', 'uid'),
+                    ('session_invites', 'ix_session_invites_token', 'token'),
+                    ('scores', 'ix_scores_session_rater_owner', 'session_id, rater_uid, list_owner_uid'),
+                    ('notifications', 'ix_notifications_user_read_created', 'user_email, read_at, created_at'),
+                    ('messages', 'ix_messages_session_created', 'session_id, created_at'),
+                ):
+                    if not inspector.has_table(table_name):
+                        continue
+                    existing_indexes = {idx['name'] for idx in inspector.get_indexes(table_name)}
+                    if index_name not in existing_indexes:
+                        conn.execute(sql_text(f'CREATE INDEX {index_name} ON {table_name} ({columns})'))
+
+                # superseded by ix_notifications_user_read_created (both are leading prefixes of it)
+                if inspector.has_table('notifications'):
+                    existing = {idx['name'] for idx in inspector.get_indexes('notifications')}
+                    for index_name in ('ix_notifications_user_read', 'ix_notifications_user_email'):
+                        if index_name not in existing:
+                            continue
+                        if engine.dialect.name == 'mysql':
+                            conn.execute(sql_text(f'DROP INDEX {index_name} ON notifications'))
+                        else:
+                            conn.execute(sql_text(f'DROP INDEX {index_name}'))
 
                 if not inspector.has_table('owner_list_states'):
                     OwnerListState.__table__.create(bind=engine, checkfirst=True)
@@ -229,7 +511,10 @@ def ensure_schema(retries: int = 5, delay: float = 2.0):
             if attempt > retries:
                 raise
             sleep_for = delay * attempt
-            print(f"ensure_schema retry {attempt}/{retries} after OperationalError: {exc}. Sleeping {sleep_for}s")
+            app.logger.warning(
+                "ensure_schema retry %s/%s after OperationalError: %s. Sleeping %ss",
+                attempt, retries, exc, sleep_for,
+            )
             time.sleep(sleep_for)
 
 
@@ -250,21 +535,35 @@ def now_utc():
     # naive UTC datetime stored in DB
     return datetime.utcnow()
 
-EMAIL_REGEX = re.compile(
-    r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*@"
-    r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
-    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+$"
-)
+# dot-atom local part @ two or more LDH labels (1-63 chars, no edge hyphens)
+_EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + "!#$%&'*+/=?^_`{|}~-")
+_EMAIL_LABEL_CHARS = frozenset(string.ascii_letters + string.digits + "-")
 
 
 def _uuid() -> str:
     return uuid4().hex
 
 
+@functools.lru_cache(maxsize=4096)
 def _is_valid_email(value: str) -> bool:
     if not value or len(value) > 320:
         return False
-    return EMAIL_REGEX.match(value) is not None
+    # single linear pass over the parts; no backtracking on hostile input
+    local, _, domain = value.partition("@")
+    if not local or not domain:
+        return False
+    for atom in local.split("."):
+        if not atom or not _EMAIL_LOCAL_CHARS.issuperset(atom):
+            return False
+    labels = domain.split(".")
+    if len(labels) < 2:
+        return False
+    for label in labels:
+        if not 0 < len(label) <= 63 or label[0] == "-" or label[-1] == "-":
+            return False
+        if not _EMAIL_LABEL_CHARS.issuperset(label):
+            return False
+    return True
 
 
 def _normalize_email(value: str) -> str:
@@ -272,6 +571,8 @@ def _normalize_email(value: str) -> str:
 
 
 def _isoformat(value):
+    # response payloads pass datetimes through as-is: OrjsonProvider renders
+    # them in this same format, natively
     if not value:
         return None
     if isinstance(value, datetime):
@@ -293,6 +594,37 @@ def _hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
+_PASSWORD_CONTEXT = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10, deprecated="auto")
+_LEGACY_HASH_PREFIXES = ("pbkdf2:", "scrypt:")  # werkzeug generate_password_hash
+NO_PASSWORD_HASH = "!oauth"  # no hash scheme starts with "!"; marks Google-only accounts
+
+
+def _hash_password(password: str) -> str:
+    return _PASSWORD_CONTEXT.hash(password)
+
+
+def _verify_password(user: "User", password: str) -> bool:
+    """Check a password, upgrading legacy or outdated hashes in place."""
+    stored = user.password_hash or ""
+    if stored.startswith(_LEGACY_HASH_PREFIXES):
+        if not check_password_hash(stored, password):
+            return False
+        user.password_hash = _hash_password(password)
+        return True
+    try:
+        valid, new_hash = _PASSWORD_CONTEXT.verify_and_update(password, stored)
+    except ValueError:
+        return False
+    if valid and new_hash:
+        user.password_hash = new_hash
+    return valid
+
+
+def _json_body() -> dict:
+    data = request.get_json(force=True, silent=True, cache=True)
+    return data if isinstance(data, dict) else {}
+
+
 def _extract_auth_token() -> Optional[str]:
     auth_header = request.headers.get("Authorization", "")
     if isinstance(auth_header, str):
@@ -337,22 +669,31 @@ def _issue_session_token(db, user: User, *, ttl_hours: int = SESSION_TOKEN_TTL_H
     return raw_token
 
 
+# last_used_at is informational; refreshing it at most this often keeps the
+# auth check from dirtying the token row (an UPDATE at commit) on every call
+TOKEN_LAST_USED_RESOLUTION = timedelta(minutes=5)
+
+
 def _require_user(db) -> User:
     token = _extract_auth_token()
     if not token:
         raise AuthError("Authentication required")
+    # token and user come back from the one JOIN
     record = (
         db.query(SessionToken)
         .join(User)
+        .options(contains_eager(SessionToken.user))
         .filter(SessionToken.token_hash == _hash_token(token))
         .first()
     )
     if not record:
         raise AuthError("Invalid or expired session")
-    if record.expires_at < now_utc():
+    now = now_utc()
+    if record.expires_at < now:
         db.delete(record)
         raise AuthError("Session expired")
-    record.last_used_at = now_utc()
+    if record.last_used_at is None or now - record.last_used_at >= TOKEN_LAST_USED_RESOLUTION:
+        record.last_used_at = now
     g.current_session_token = record
     g.current_user = record.user
     return record.user
@@ -384,23 +725,23 @@ def _log_activity(db, *, actor: Optional[str], action: str, session_id: Optional
             except Exception as exc:
                 app.logger.warning("Unable to serialize activity details for %s: %s", action, exc)
                 details_str = json.dumps({"__repr__": repr(details)})
-    try:
-        entry = ActivityLog(
-            actor_email=actor,
-            action=action,
-            session_id=session_id,
-            details=details_str,
-        )
-        db.add(entry)
-    except Exception as exc:
-        app.logger.warning("Failed to record activity %s: %s", action, exc)
+    # buffered so a request's log rows go out as one multi-row INSERT at commit
+    _queue_insert(db, _INSERT_ACTIVITY, {
+        "actor_email": actor,
+        "action": action,
+        "session_id": session_id,
+        "details": details_str,
+    })
+
+
+_NAME_SEPARATORS_RE = re.compile(r"[._+\-]+")
 
 
 def _first_name_from_email(value: str) -> str:
     if not value:
         return "friend"
     name = value.split("@")[0]
-    name = re.sub(r"[._+\-]+", " ", name).strip()
+    name = _NAME_SEPARATORS_RE.sub(" ", name).strip()
     return name.title() if name else "friend"
 
 
@@ -418,37 +759,6 @@ def _render_reset_email_html(*, first_name: str, reset_link: Optional[str]) -> s
         button_html = """
         <p style=\"margin:20px 0;\">If the button is missing, open the app and request another reset link or contact support for help.</p>
         """
-
-
-
-def _ensure_reset_link(token: str) -> Optional[str]:
-    if not PASSWORD_RESET_URL_BASE:
-        return None
-    base = PASSWORD_RESET_URL_BASE
-    if "{token}" in base:
-        link = base.replace("{token}", token)
-    elif base.endswith("?") or base.endswith("&"):
-        link = f"{base}token={token}"
-    elif base.endswith("="):
-        link = f"{base}{token}"
-    elif "?" in base:
-        link = f"{base}&token={token}"
-    elif base.endswith(("/", "#")):
-        link = f"{base}{token}"
-    else:
-        link = f"{base}?token={token}"
-    return _append_reset_params(link, token)
-
-
-def _append_reset_params(link: str, token: str) -> str:
-    parsed = urlparse(link)
-    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
-    if not query.get("token"):
-        query["token"] = token
-    if "mode" not in query:
-        query["mode"] = "reset"
-    new_query = urlencode(query)
-    return urlunparse(parsed._replace(query=new_query))
     return f"""
     <!DOCTYPE html>
     <html lang=\"en\">
@@ -484,6 +794,25 @@ def _append_reset_params(link: str, token: str) -> str:
     """
 
 
+def _ensure_reset_link(token: str) -> Optional[str]:
+    if not PASSWORD_RESET_URL_BASE:
+        return None
+    # an explicit {token} placeholder wins; otherwise the token rides in the query
+    link = PASSWORD_RESET_URL_BASE.replace("{token}", token)
+    return _append_reset_params(link, token)
+
+
+def _append_reset_params(link: str, token: str) -> str:
+    parsed = urlparse(link)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    if not query.get("token"):
+        query["token"] = token
+    if "mode" not in query:
+        query["mode"] = "reset"
+    new_query = urlencode(query)
+    return urlunparse(parsed._replace(query=new_query))
+
+
 def _build_invite_email_plain(*, invitee_name: str, inviter_name: str, session_title: str, invite_link: str, existing_user: bool) -> str:
     greeting = f"Hi {invitee_name},"
     if existing_user:
@@ -589,7 +918,7 @@ def _send_session_invite_email(
         invite_link=invite_link,
         existing_user=existing_user,
     )
-    return _send_email(subject=subject, body=body, html_body=html_body, recipient=invite_email)
+    return _queue_email(subject=subject, body=body, html_body=html_body, recipient=invite_email)
 
 
 def _build_invite_link(origin: str, session_id: str, *, token: Optional[str], existing_user: bool, invite_email: str) -> str:
@@ -604,20 +933,40 @@ def _build_invite_link(origin: str, session_id: str, *, token: Optional[str], ex
     return f"{origin}/?{urlencode(params)}"
 
 
+def _notification_values(*, user_email: str, session_id: Optional[str], type_: str, payload: Optional[dict] = None) -> dict:
+    return {
+        "user_email": user_email,
+        "session_id": session_id,
+        "type": type_,
+        "payload": orjson.dumps(payload).decode() if payload else None,
+    }
+
+
 def _create_notification(db, *, user_email: str, session_id: Optional[str], type_: str, payload: Optional[dict] = None):
     if not user_email:
-        return None
-    note = Notification(
+        return
+    _queue_insert(db, _INSERT_NOTIFICATION, _notification_values(
         user_email=user_email,
         session_id=session_id,
-        type=type_,
-        payload=json.dumps(payload, ensure_ascii=True) if payload else None,
-    )
-    db.add(note)
-    return note
+        type_=type_,
+        payload=payload,
+    ))
+
+
+def _notify_many(db, user_emails, *, session_id: Optional[str], type_: str, payload: Optional[dict] = None):
+    """Fan one notification out to several users; written with the commit's notification batch."""
+    for email in user_emails:
+        _create_notification(db, user_email=email, session_id=session_id, type_=type_, payload=payload)
 
 
-def _serialize_notification(note: Notification) -> dict:
+def _other_member_uids(db, session_id: str, exclude_uid: str) -> list:
+    return db.execute(
+        select(Member.uid).where(Member.session_id == session_id, Member.uid != exclude_uid)
+    ).scalars().all()
+
+
+def _serialize_notification(note) -> dict:
+    """Serialize a Notification or a row carrying the same columns."""
     payload = None
     if note.payload:
         try:
@@ -629,8 +978,8 @@ def _serialize_notification(note: Notification) -> dict:
         "sessionId": note.session_id,
         "type": note.type,
         "payload": payload,
-        "readAt": _isoformat(note.read_at),
-        "createdAt": _isoformat(note.created_at),
+        "readAt": note.read_at,
+        "createdAt": note.created_at,
     }
 
 
@@ -642,7 +991,7 @@ def _serialize_message(message: Message) -> dict:
         "recipient": message.recipient_uid,
         "body": message.body,
         "kind": message.kind,
-        "createdAt": _isoformat(message.created_at),
+        "createdAt": message.created_at,
     }
 
 
@@ -650,25 +999,57 @@ def _normalize_name_key(value: str) -> str:
     return (value or "").strip().lower()
 
 
+def _name_audio_url(name_key: str) -> str:
+    # audio is fetched by the browser from its own cacheable URL instead of
+    # riding along base64-encoded in every session payload
+    return f"/api/names/{quote(name_key, safe='')}/audio"
+
+
+def _name_metadata_payload(name_key: str, *, info, phonetic, has_audio: bool) -> dict:
+    return {
+        "info": info or "",
+        "phonetic": phonetic or "",
+        "audioUrl": _name_audio_url(name_key) if has_audio else "",
+    }
+
+
 def _get_name_metadata_map(db, names) -> dict:
     if not names:
         return {}
-    keys = {_normalize_name_key(name): name for name in names if name and name.strip()}
+    keys = {_normalize_name_key(name) for name in names if name and name.strip()}
     if not keys:
         return {}
-    rows = (
-        db.query(NameMetadata)
-        .filter(NameMetadata.name_key.in_(list(keys.keys())))
-        .all()
-    )
     results = {}
+    with _NAME_METADATA_CACHE_LOCK:
+        for key in keys:
+            cached = _NAME_METADATA_CACHE.get(key)
+            if cached is not None:
+                results[key] = cached
+    missing = keys.difference(results)
+    if not missing:
+        return results
+
+    rows = db.execute(
+        select(
+            NameMetadata.name_key,
+            NameMetadata.info_text,
+            NameMetadata.phonetic,
+            # only whether a clip exists; the blob itself stays in MySQL
+            (func.coalesce(func.length(NameMetadata.audio_base64), 0) > 0).label("has_audio"),
+        ).where(NameMetadata.name_key.in_(missing))
+    )
+    fetched = {}
     for row in rows:
-        results[row.name_key] = {
-            "info": row.info_text or "",
-            "phonetic": row.phonetic or "",
-            "audioBase64": row.audio_base64 or "",
-            "audioMime": row.audio_mime or "audio/mpeg",
-        }
+        fetched[row.name_key] = _name_metadata_payload(
+            row.name_key,
+            info=row.info_text,
+            phonetic=row.phonetic,
+            has_audio=bool(row.has_audio),
+        )
+    if fetched:
+        with _NAME_METADATA_CACHE_LOCK:
+            _NAME_METADATA_CACHE.update(fetched)
+    results.update(fetched)
     return results
 
 
@@ -734,10 +1115,10 @@ def _generate_name_fact(name: str) -> Optional[dict]:
             if status == 400 and attempt_payload is payloads[0]:
                 # try fallback without response_format
                 continue
-            print(f"Failed to generate name metadata for {name}: {exc}")
+            app.logger.warning("Failed to generate name metadata for %s: %s", name, exc)
             return None
         except (http_requests.RequestException, ValueError, KeyError, IndexError) as exc:  # pragma: no cover
-            print(f"Failed to generate name metadata for {name}: {exc}")
+            app.logger.warning("Failed to generate name metadata for %s: %s", name, exc)
             return None
 
         raw_text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
@@ -791,7 +1172,7 @@ def _generate_name_audio(name: str) -> Optional[dict]:
         mime = f"audio/{OPENAI_TTS_FORMAT}" if OPENAI_TTS_FORMAT else "audio/mpeg"
         return {"audioBase64": encoded, "audioMime": mime}
     except http_requests.RequestException as exc:  # pragma: no cover
-        print(f"Failed to generate pronunciation audio for {name}: {exc}")
+        app.logger.warning("Failed to generate pronunciation audio for %s: %s", name, exc)
         return None
 
 
@@ -823,12 +1204,12 @@ def _prime_name_metadata(db, names) -> dict:
             source="openai",
         )
         db.add(metadata)
-        existing[key] = {
-            "info": info_payload.get("description", ""),
-            "phonetic": info_payload.get("phonetic", ""),
-            "audioBase64": (audio_payload or {}).get("audioBase64", ""),
-            "audioMime": (audio_payload or {}).get("audioMime", "audio/mpeg"),
-        }
+        existing[key] = _name_metadata_payload(
+            key,
+            info=info_payload.get("description"),
+            phonetic=info_payload.get("phonetic"),
+            has_audio=bool((audio_payload or {}).get("audioBase64")),
+        )
     db.flush()
     return existing
 
@@ -852,7 +1233,7 @@ class ResetToken(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String(36), nullable=False, unique=True)
+    token = Column(String(64), nullable=False, unique=True)  # sha256 of the emailed token
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=now_utc, nullable=False)
 
@@ -879,6 +1260,9 @@ class Session(Base):
     title = Column(String(200), nullable=False)
     created_by = Column(String(64), nullable=False)
     max_owners = Column(Integer, nullable=False, default=2)
+    # owner members are only created with the session; joins add participants
+    # and the owner can't be removed, so this stays fixed once written
+    owners_count = Column(Integer, nullable=False, default=1)
     max_names = Column(Integer, nullable=False, default=10)
     name_focus = Column(String(16), nullable=False, default="mix")
     status = Column(String(16), nullable=False, default="active")
@@ -891,9 +1275,9 @@ class Session(Base):
     final_winners = Column(Text, nullable=True)
     created_at = Column(DateTime, default=now_utc, nullable=False)
 
-    members = relationship("Member", back_populates="session", cascade="all, delete-orphan")
-    lists = relationship("ListItem", back_populates="session", cascade="all, delete-orphan")
-    scores = relationship("Score", back_populates="session", cascade="all, delete-orphan")
+    members = relationship("Member", cascade="all, delete-orphan")
+    lists = relationship("ListItem", cascade="all, delete-orphan")
+    scores = relationship("Score", cascade="all, delete-orphan")
     invites = relationship("SessionInvite", back_populates="session", cascade="all, delete-orphan")
     owner_states = relationship("OwnerListState", back_populates="session", cascade="all, delete-orphan")
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
@@ -902,13 +1286,15 @@ class Session(Base):
 
 class Member(Base):
     __tablename__ = "members"
+    __table_args__ = (
+        Index("ix_members_session_role", "session_id", "role"),
+        Index("ix_members_uid", "uid"),
+    )
 
     session_id = Column(String(36), ForeignKey("sessions.id"), primary_key=True)
     uid = Column(String(64), primary_key=True)
     role = Column(String(16), nullable=False)  # owner | voter
-    joined_at = Column(DateTime, default=now_utc, nullable=False)
-
-    session = relationship("Session", back_populates="members")
+    joined_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
 
 class ListItem(Base):
     __tablename__ = "list_items"
@@ -919,19 +1305,18 @@ class ListItem(Base):
     self_rank = Column(Integer, nullable=False)  # 1-10
     created_at = Column(DateTime, default=now_utc, nullable=False)
 
-    session = relationship("Session", back_populates="lists")
-
 class Score(Base):
     __tablename__ = "scores"
+    __table_args__ = (
+        Index("ix_scores_session_rater_owner", "session_id", "rater_uid", "list_owner_uid"),
+    )
 
     session_id = Column(String(36), ForeignKey("sessions.id"), primary_key=True)
     list_owner_uid = Column(String(64), primary_key=True)
     rater_uid = Column(String(64), primary_key=True)
     name = Column(String(100), primary_key=True)
     score_value = Column(Integer, nullable=False)  # 1-10
-    created_at = Column(DateTime, default=now_utc, nullable=False)
-
-    session = relationship("Session", back_populates="scores")
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
 
 
 class TieBreakVote(Base):
@@ -948,6 +1333,9 @@ class TieBreakVote(Base):
 
 class SessionInvite(Base):
     __tablename__ = "session_invites"
+    __table_args__ = (
+        Index("ix_session_invites_token", "token"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, index=True)
@@ -974,6 +1362,9 @@ class OwnerListState(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_session_created", "session_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(36), ForeignKey("sessions.id"), nullable=False, index=True)
@@ -988,9 +1379,13 @@ class Message(Base):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # unread feed: equality on user_email/read_at, then created_at order
+        Index("ix_notifications_user_read_created", "user_email", "read_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_email = Column(String(320), nullable=False, index=True)
+    user_email = Column(String(320), nullable=False)
     session_id = Column(String(36), ForeignKey("sessions.id"), nullable=True)
     type = Column(String(32), nullable=False)
     payload = Column(Text, nullable=True)
@@ -1025,8 +1420,52 @@ class ActivityLog(Base):
     created_at = Column(DateTime, default=now_utc, nullable=False, index=True)
 
 
-ensure_schema()
-seed_owner_states()
+_migrations_lock = threading.Lock()
+_migrations_done = False
+
+
+def run_migrations():
+    """Apply schema fixes and seed owner states at most once per process."""
+    global _migrations_done
+    with _migrations_lock:
+        if _migrations_done:
+            return
+        ensure_schema()
+        seed_owner_states()
+        _migrations_done = True
+
+
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Create missing tables/columns/indexes and seed owner list states."""
+    run_migrations()
+    click.echo("Schema is up to date.")
+
+
+def _purge_expired_reset_tokens(db) -> int:
+    """Bulk-delete reset tokens past their expiry; returns the number removed."""
+    removed = (
+        db.query(ResetToken)
+        .filter(ResetToken.expires_at < now_utc())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+
+@app.cli.command("gc-reset-tokens")
+def gc_reset_tokens_command():
+    """Delete expired password reset tokens (schedule e.g. hourly via cron)."""
+    db = SessionLocal()
+    try:
+        removed = _purge_expired_reset_tokens(db)
+    finally:
+        SessionLocal.remove()
+    click.echo(f"Removed {removed} expired reset token(s).")
+
+
+if RUN_MIGRATIONS_ON_IMPORT:
+    run_migrations()
 
 app.logger.info(
     "Email config -> sendgrid=%s, smtp_host=%s, sender=%s, tls=%s",
@@ -1037,6 +1476,18 @@ app.logger.info(
 )
 
 
+# invite and reset emails are sent off the request thread; SMTP round-trips
+# would otherwise hold a worker for the whole delivery
+EMAIL_SEND_ATTEMPTS = 3
+_EMAIL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="email")
+
+
+def _email_delivery_configured() -> bool:
+    if not EMAIL_SENDER:
+        return False
+    return bool((SENDGRID_API_KEY and SendGridAPIClient and Mail and Content) or SMTP_HOST)
+
+
 def _send_email(*, subject: str, body: str, recipient: str, html_body: Optional[str] = None) -> bool:
     """Basic SMTP email helper; returns True on success."""
     if not EMAIL_SENDER:
@@ -1108,6 +1559,27 @@ def _send_email(*, subject: str, body: str, recipient: str, html_body: Optional[
         return False
 
 
+def _send_email_with_retry(**email) -> bool:
+    for attempt in range(EMAIL_SEND_ATTEMPTS):
+        if attempt:
+            time.sleep(2 ** attempt)  # back off 2s, 4s between transient failures
+        if _send_email(**email):
+            return True
+    app.logger.error("Giving up on email to %s after %s attempts", email["recipient"], EMAIL_SEND_ATTEMPTS)
+    return False
+
+
+def _queue_email(*, subject: str, body: str, recipient: str, html_body: Optional[str] = None) -> bool:
+    """Hand an already-rendered email to the background sender; False if delivery isn't configured."""
+    if not _email_delivery_configured():
+        app.logger.info("Email delivery not configured; would send to %s", recipient)
+        return False
+    _EMAIL_EXECUTOR.submit(
+        _send_email_with_retry, subject=subject, body=body, html_body=html_body, recipient=recipient
+    )
+    return True
+
+
 def _ensure_owner_list_state(db, session_id: str, uid: str):
     if not uid:
         return None
@@ -1119,6 +1591,27 @@ def _ensure_owner_list_state(db, session_id: str, uid: str):
     return state
 
 
+def _insert_owner_list_state(db, session_id: str, uid: str):
+    """Create a draft list state for uid unless one exists, without reading it first."""
+    values = {
+        "session_id": session_id,
+        "owner_uid": uid,
+        "status": "draft",
+        "updated_at": now_utc(),
+        "slot_count": 0,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_dialect.insert(OwnerListState).values(values)
+        stmt = stmt.on_duplicate_key_update(owner_uid=stmt.inserted.owner_uid)
+    elif dialect == "sqlite":
+        stmt = sqlite_dialect.insert(OwnerListState).values(values).on_conflict_do_nothing()
+    else:
+        _ensure_owner_list_state(db, session_id, uid)
+        return
+    db.execute(stmt)
+
+
 def _session_member_role(raw_role: Optional[str]) -> str:
     role = (raw_role or "participant").strip().lower()
     if role == "owner":
@@ -1139,6 +1632,11 @@ def _compute_invite_origin(request_obj) -> str:
     return request_obj.host_url.rstrip("/")
 
 
+_INSERT_INVITE = SessionInvite.__table__.insert()
+_INSERT_NOTIFICATION = Notification.__table__.insert()
+_INSERT_ACTIVITY = ActivityLog.__table__.insert()
+
+
 def _invite_participants(db, *, session: Session, owner_email: str, invite_specs, origin: str):
     if not invite_specs:
         return []
@@ -1146,6 +1644,7 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
     results = []
     session_id = session.id
 
+    invite_emails = []
     for spec in invite_specs:
         invite_email = _normalize_email(spec.get("email")) if isinstance(spec, dict) else _normalize_email(spec)
         if not invite_email or invite_email == owner_email:
@@ -1155,9 +1654,29 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
         if role == "owner":
             # only one owner – skip silently
             continue
-
-        existing_member = _ensure_member(db, session_id, invite_email)
-        user_exists = db.query(User.id).filter_by(email=invite_email).scalar() is not None
+        invite_emails.append(invite_email)
+
+    if not invite_emails:
+        return results
+
+    # one lookup per table for the whole batch instead of three per invitee
+    member_uids = set(db.execute(
+        select(Member.uid).where(Member.session_id == session_id, Member.uid.in_(invite_emails))
+    ).scalars())
+    user_emails = set(db.execute(
+        select(User.email).where(User.email.in_(invite_emails))
+    ).scalars())
+    new_invites = []
+    new_notifications = []
+    pending_invites = {}
+    for row in db.execute(
+        select(SessionInvite).where(SessionInvite.session_id == session_id, SessionInvite.email.in_(invite_emails))
+    ).scalars():
+        pending_invites.setdefault(row.email, []).append(row)
+
+    for invite_email in invite_emails:
+        existing_member = invite_email in member_uids
+        user_exists = invite_email in user_emails
         if existing_member:
             results.append({
                 "email": invite_email,
@@ -1170,9 +1689,11 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
 
         if user_exists:
             db.add(Member(session_id=session_id, uid=invite_email, role="participant"))
+            member_uids.add(invite_email)
             _ensure_owner_list_state(db, session_id, invite_email)
             # remove any pending invite tokens for cleanliness
-            db.query(SessionInvite).filter_by(session_id=session_id, email=invite_email).delete()
+            for stale_invite in pending_invites.pop(invite_email, []):
+                db.delete(stale_invite)
             member_link = _build_invite_link(
                 origin,
                 session_id,
@@ -1194,8 +1715,7 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
                 "link": member_link,
                 "emailSent": email_sent,
             })
-            _create_notification(
-                db,
+            new_notifications.append(_notification_values(
                 user_email=invite_email,
                 session_id=session_id,
                 type_="session_invite",
@@ -1204,14 +1724,10 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
                     "title": session.title,
                     "invitedBy": owner_email,
                 },
-            )
+            ))
             continue
 
-        invite_row = (
-            db.query(SessionInvite)
-            .filter_by(session_id=session_id, email=invite_email)
-            .first()
-        )
+        invite_row = next(iter(pending_invites.get(invite_email, [])), None)
         if invite_row is None:
             invite_row = SessionInvite(
                 session_id=session_id,
@@ -1219,7 +1735,8 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
                 role="participant",
                 token=_uuid(),
             )
-            db.add(invite_row)
+            new_invites.append(invite_row)
+            pending_invites[invite_email] = [invite_row]
         else:
             invite_row.role = "participant"
             if not invite_row.token:
@@ -1247,64 +1764,159 @@ def _invite_participants(db, *, session: Session, owner_email: str, invite_specs
             "emailSent": email_sent,
         })
 
+    # autoincrement ids would force one INSERT per ORM object on MySQL
+    # (no RETURNING); plain executemany rows go out as one multi-row INSERT
+    if new_invites:
+        db.flush()
+        db.execute(_INSERT_INVITE, [
+            {"session_id": row.session_id, "email": row.email, "role": row.role, "token": row.token}
+            for row in new_invites
+        ])
+    # notifications join the commit-time batch with every other notification
+    for values in new_notifications:
+        _queue_insert(db, _INSERT_NOTIFICATION, values)
+
     return results
 
 
-def _session_activity_timestamp(db, session_id: str):
-    timestamps = [
-        db.query(Session.created_at).filter_by(id=session_id).scalar(),
-        db.query(func.max(Member.joined_at)).filter_by(session_id=session_id).scalar(),
-        db.query(func.max(ListItem.created_at)).filter_by(session_id=session_id).scalar(),
-        db.query(func.max(Score.created_at)).filter_by(session_id=session_id).scalar(),
+def _replace_list_items(db, session_id: str, owner_uid: str, cleaned):
+    """Sync an owner's list rows to ``cleaned`` without a full delete + reinsert."""
+    stale = db.query(ListItem).filter(ListItem.session_id == session_id, ListItem.owner_uid == owner_uid)
+    if cleaned:
+        stale = stale.filter(ListItem.name.notin_([name for name, _ in cleaned]))
+    stale.delete(synchronize_session=False)
+    if not cleaned:
+        return
+
+    now = now_utc()
+    rows = [
+        {"session_id": session_id, "owner_uid": owner_uid, "name": name, "self_rank": rank, "created_at": now}
+        for name, rank in cleaned
     ]
-    timestamps = [t for t in timestamps if t]
-    return max(timestamps) if timestamps else None
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_dialect.insert(ListItem).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            name=stmt.inserted.name,
+            self_rank=stmt.inserted.self_rank,
+            created_at=stmt.inserted.created_at,
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_dialect.insert(ListItem).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ListItem.session_id, ListItem.owner_uid, ListItem.name],
+            set_={"self_rank": stmt.excluded.self_rank, "created_at": stmt.excluded.created_at},
+        )
+    else:
+        for row in rows:
+            db.merge(ListItem(**row))
+        return
+    db.execute(stmt)
+
+
+def _upsert_score(db, *, session_id: str, list_owner_uid: str, rater_uid: str, name: str, score_value: int):
+    """Insert a vote or overwrite the rater's previous value for that name in one statement."""
+    values = {
+        "session_id": session_id,
+        "list_owner_uid": list_owner_uid,
+        "rater_uid": rater_uid,
+        "name": name,
+        "score_value": score_value,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_dialect.insert(Score).values(values)
+        stmt = stmt.on_duplicate_key_update(
+            score_value=stmt.inserted.score_value,
+            created_at=func.current_timestamp(),
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_dialect.insert(Score).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Score.session_id, Score.list_owner_uid, Score.rater_uid, Score.name],
+            set_={"score_value": stmt.excluded.score_value, "created_at": func.current_timestamp()},
+        )
+    else:
+        db.merge(Score(**values, created_at=now_utc()))
+        return
+    db.execute(stmt)
+
+
+def _session_activity_timestamps(db, session_ids) -> dict:
+    """Latest activity (session creation, join, list edit, score) per session id."""
+    if not session_ids:
+        return {}
+    activity = union_all(
+        select(Session.id.label("session_id"), Session.created_at.label("ts"))
+        .where(Session.id.in_(session_ids)),
+        select(Member.session_id, func.max(Member.joined_at))
+        .where(Member.session_id.in_(session_ids)).group_by(Member.session_id),
+        select(ListItem.session_id, func.max(ListItem.created_at))
+        .where(ListItem.session_id.in_(session_ids)).group_by(ListItem.session_id),
+        select(Score.session_id, func.max(Score.created_at))
+        .where(Score.session_id.in_(session_ids)).group_by(Score.session_id),
+    ).subquery()
+    return dict(db.execute(
+        select(activity.c.session_id, func.max(activity.c.ts)).group_by(activity.c.session_id)
+    ).all())
+
+
+def _session_activity_timestamp(db, session_id: str):
+    return _session_activity_timestamps(db, [session_id]).get(session_id)
 
 
 def _recompute_session_status(db, session_id: str):
-    session = db.query(Session).filter_by(id=session_id).first()
+    session = db.get(Session, session_id)
     if not session:
         return
+    # completion needs locked invites, so an unlocked active session can
+    # only stay active; skip the aggregate scans
+    if session.status == "active" and not session.invites_locked:
+        return
 
-    members = db.query(Member).filter_by(session_id=session_id).all()
-    participant_uids = [m.uid for m in members if m.role in {"owner", "voter", "participant"}]
+    participant_uids = db.execute(
+        select(Member.uid).where(
+            Member.session_id == session_id,
+            Member.role.in_(("owner", "voter", "participant")),
+        )
+    ).scalars().all()
     if not participant_uids:
         target_status = "active"
     else:
-        state_rows = db.query(OwnerListState).filter_by(session_id=session_id).all()
-        state_map = {row.owner_uid: row for row in state_rows}
-        all_submitted = all(state_map.get(uid) and state_map[uid].status == "submitted" for uid in participant_uids)
+        state_map = dict(db.execute(
+            select(OwnerListState.owner_uid, OwnerListState.status)
+            .where(OwnerListState.session_id == session_id)
+        ).all())
+        all_submitted = all(state_map.get(uid) == "submitted" for uid in participant_uids)
 
         if not all_submitted:
             target_status = "active"
         else:
             required_names = session.max_names or 10
-            list_rows = db.query(ListItem).filter_by(session_id=session_id).all()
-            names_by_owner = {}
-            for row in list_rows:
-                names_by_owner.setdefault(row.owner_uid, []).append(row.name)
-            names_ready = all(len(names_by_owner.get(uid, [])) == required_names for uid in participant_uids)
+            names_by_owner = dict(db.execute(
+                select(ListItem.owner_uid, func.count())
+                .where(ListItem.session_id == session_id)
+                .group_by(ListItem.owner_uid)
+            ).all())
+            names_ready = all(names_by_owner.get(uid, 0) == required_names for uid in participant_uids)
 
             if not names_ready:
                 target_status = "active"
             else:
-                score_rows = db.query(Score).filter_by(session_id=session_id).all()
-                score_map = {}
-                for row in score_rows:
-                    score_map.setdefault(row.rater_uid, {}).setdefault(row.list_owner_uid, set()).add(row.name)
-
-                all_scored = True
-                for rater in participant_uids:
-                    for owner_uid in participant_uids:
-                        if owner_uid == rater:
-                            continue
-                        expected_names = names_by_owner.get(owner_uid, [])
-                        scored_names = score_map.get(rater, {}).get(owner_uid, set())
-                        if len(scored_names) < len(expected_names):
-                            all_scored = False
-                            break
-                    if not all_scored:
-                        break
+                score_counts = {
+                    (rater, owner_uid): count
+                    for rater, owner_uid, count in db.execute(
+                        select(Score.rater_uid, Score.list_owner_uid, func.count())
+                        .where(Score.session_id == session_id)
+                        .group_by(Score.rater_uid, Score.list_owner_uid)
+                    )
+                }
+                all_scored = all(
+                    score_counts.get((rater, owner_uid), 0) >= names_by_owner.get(owner_uid, 0)
+                    for rater in participant_uids
+                    for owner_uid in participant_uids
+                    if owner_uid != rater
+                )
 
                 target_status = "completed" if (all_scored and session.invites_locked) else "active"
 
@@ -1328,6 +1940,24 @@ def _first_place_tie_names(totals: dict) -> list:
     return [name for name, value in totals.items() if value == lowest]
 
 
+# the Session fields _serialize_session_for_user and the list view read
+_SESSION_LIST_COLUMNS = (
+    Session.id,
+    Session.title,
+    Session.status,
+    Session.max_names,
+    Session.name_focus,
+    Session.invites_locked,
+    Session.template_ready,
+    Session.tiebreak_active,
+    Session.final_winners,
+    Session.created_at,
+    Session.invite_owner_token,
+    Session.invite_voter_token,
+    Session.owners_count,
+)
+
+
 def _serialize_session_for_user(session: Session, *, role: str, owners: int, max_owners: int, activity_ts) -> dict:
     max_names = session.max_names or 10
     return {
@@ -1343,12 +1973,31 @@ def _serialize_session_for_user(session: Session, *, role: str, owners: int, max
         "templateReady": bool(session.template_ready),
         "tieBreakActive": bool(session.tiebreak_active),
         "finalWinners": _load_json_array(session.final_winners),
-        "createdAt": _isoformat(session.created_at),
-        "updatedAt": _isoformat(activity_ts or session.created_at),
+        "createdAt": session.created_at,
+        "updatedAt": activity_ts or session.created_at,
         "role": role,
     }
 
 
+def _visible_messages(db, session_id: str, viewer_uid: str, limit: int = 200) -> list:
+    """Latest messages the viewer may see (broadcasts and their own DMs), oldest first."""
+    rows = db.execute(
+        select(Message)
+        .where(
+            Message.session_id == session_id,
+            or_(
+                Message.recipient_uid.is_(None),
+                Message.recipient_uid == viewer_uid,
+                Message.sender_uid == viewer_uid,
+            ),
+        )
+        .order_by(Message.created_at.desc())
+        .limit(limit)
+    ).scalars().all()
+    rows.reverse()
+    return rows
+
+
 def _serialize_session_doc(session: Session, members, *, include_tokens: bool):
     owner_ids = [m.uid for m in members if m.role == "owner"]
     participant_ids = [m.uid for m in members if m.role in {"participant", "voter"}]
@@ -1365,7 +2014,7 @@ def _serialize_session_doc(session: Session, members, *, include_tokens: bool):
         "ownerIds": owner_ids,
         "voterIds": voter_ids,
         "participantIds": participant_ids,
-        "createdAt": _isoformat(session.created_at),
+        "createdAt": session.created_at,
         "createdBy": session.created_by,
         "invitesLocked": bool(session.invites_locked),
         "templateReady": bool(session.template_ready),
@@ -1387,89 +2036,79 @@ def _serialize_session_doc(session: Session, members, *, include_tokens: bool):
 # --- Signup endpoint (MySQL-backed) ---
 @app.route("/api/signup", methods=["POST"])
 def api_signup():
-    db = SessionLocal()
-    try:
-        data = request.get_json(force=True) or {}
-        full_name = (data.get("fullName") or "").strip()
-        email = (data.get("email") or "").strip().lower()
-        password = data.get("password") or ""
-
-        if not full_name or not email or not password:
-            return jsonify({"ok": False, "error": "Missing fields"}), 400
-        if not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Invalid email address"}), 400
-        if db.query(User).filter_by(email=email).first():
-            return jsonify({"ok": False, "error": "Email already exists"}), 409
-
-        hashed = generate_password_hash(password)
-        user = User(email=email, display_name=full_name, password_hash=hashed)
-        db.add(user)
-        db.flush()
-        token = _issue_session_token(db, user)
-        _log_activity(
-            db,
-            actor=email,
-            action="user.signup",
-            details={"displayName": full_name},
-        )
-        db.commit()
-        payload = {
-            "ok": True,
-            "user": _user_payload(user),
-            "token": token,
-            "expiresIn": SESSION_TOKEN_TTL_HOURS * 3600,
-        }
-        response = jsonify(payload)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    db = get_db()
+    data = _json_body()
+    full_name = (data.get("fullName") or "").strip()
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+
+    if not full_name or not email or not password:
+        return jsonify({"ok": False, "error": "Missing fields"}), 400
+    if not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Invalid email address"}), 400
+    if db.execute(select(exists().where(User.email == email))).scalar():
+        return jsonify({"ok": False, "error": "Email already exists"}), 409
+
+    hashed = _hash_password(password)
+    user = User(email=email, display_name=full_name, password_hash=hashed)
+    db.add(user)
+    db.flush()
+    token = _issue_session_token(db, user)
+    _log_activity(
+        db,
+        actor=email,
+        action="user.signup",
+        details={"displayName": full_name},
+    )
+    db.commit()
+    payload = {
+        "ok": True,
+        "user": _user_payload(user),
+        "token": token,
+        "expiresIn": SESSION_TOKEN_TTL_HOURS * 3600,
+    }
+    response = jsonify(payload)
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 # --- Login endpoint (MySQL-backed) ---
 @app.route("/api/login", methods=["POST"])
 def api_login():
-    db = SessionLocal()
-    try:
-        data = request.get_json(force=True) or {}
-        email = (data.get("email") or "").strip().lower()
-        password = data.get("password") or ""
-        user = db.query(User).filter_by(email=email).first()
-        if not user or not check_password_hash(user.password_hash, password):
-            return jsonify({"ok": False, "error": "Invalid credentials"}), 401
-
-        token = _issue_session_token(db, user)
-        _log_activity(
-            db,
-            actor=email,
-            action="user.login",
-            details={"method": "password"},
-        )
-        db.commit()
-        payload = {
-            "ok": True,
-            "user": _user_payload(user),
-            "token": token,
-            "expiresIn": SESSION_TOKEN_TTL_HOURS * 3600,
-        }
-        response = jsonify(payload)
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    db = get_db()
+    data = _json_body()
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+    user = db.query(User).filter_by(email=email).first()
+    if user and (user.password_hash or "").startswith("!"):
+        return jsonify({"ok": False, "error": "Use Google sign-in"}), 401
+    if not user or not _verify_password(user, password):
+        return jsonify({"ok": False, "error": "Invalid credentials"}), 401
+
+    token = _issue_session_token(db, user)
+    _log_activity(
+        db,
+        actor=email,
+        action="user.login",
+        details={"method": "password"},
+    )
+    db.commit()
+    payload = {
+        "ok": True,
+        "user": _user_payload(user),
+        "token": token,
+        "expiresIn": SESSION_TOKEN_TTL_HOURS * 3600,
+    }
+    response = jsonify(payload)
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 # --- Google OAuth login endpoint ---
 @app.route("/api/google-login", methods=["POST"])
 def api_google_login():
-    db = SessionLocal()
+    db = get_db()
     try:
-        data = request.get_json(force=True) or {}
+        data = _json_body()
         token = (data.get("idToken") or "").strip()
         if not token:
             return jsonify({"ok": False, "error": "idToken required"}), 400
@@ -1478,14 +2117,17 @@ def api_google_login():
             return jsonify({"ok": False, "error": "Google login not configured"}), 503
 
         verifier_errors = []
-        request_adapter = google_requests.Request()
-        id_info = None
+        token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        with _ID_TOKEN_CACHE_LOCK:
+            id_info = _ID_TOKEN_CACHE.get(token_key)
+        if id_info is not None and id_info.get("exp", 0) <= time.time():
+            id_info = None
 
-        if FIREBASE_PROJECT_ID:
+        if id_info is None and FIREBASE_PROJECT_ID:
             try:
                 candidate = google_id_token.verify_firebase_token(
                     token,
-                    request_adapter,
+                    _GOOGLE_AUTH_REQUEST,
                     FIREBASE_PROJECT_ID,
                 )
                 issuer = candidate.get("iss")
@@ -1503,7 +2145,7 @@ def api_google_login():
             try:
                 candidate = google_id_token.verify_oauth2_token(
                     token,
-                    request_adapter,
+                    _GOOGLE_AUTH_REQUEST,
                     GOOGLE_OAUTH_CLIENT_ID,
                 )
                 issuer = candidate.get("iss")
@@ -1522,8 +2164,11 @@ def api_google_login():
                 verifier_errors.append(("oauth", str(exc)))
 
         if id_info is None:
-            print("Google token verification failed", verifier_errors)
+            app.logger.warning("Google token verification failed: %s", verifier_errors)
             return jsonify({"ok": False, "error": "Invalid Google token"}), 401
+        if id_info.get("exp", 0) > time.time():
+            with _ID_TOKEN_CACHE_LOCK:
+                _ID_TOKEN_CACHE[token_key] = id_info
 
         email = (id_info.get("email") or "").lower()
         display_name = id_info.get("name") or id_info.get("email") or "Google user"
@@ -1537,8 +2182,7 @@ def api_google_login():
 
         user = db.query(User).filter_by(email=email).first()
         if not user:
-            placeholder_password = generate_password_hash(_uuid())
-            user = User(email=email, display_name=display_name, password_hash=placeholder_password)
+            user = User(email=email, display_name=display_name, password_hash=NO_PASSWORD_HASH)
             db.add(user)
             created = True
         else:
@@ -1571,210 +2215,240 @@ def api_google_login():
         response = jsonify(payload)
         response.headers["Cache-Control"] = "no-store"
         return response
-    except Exception as exc:
+    except Exception:
         db.rollback()
-        print("Failed to persist Google user", exc)
+        app.logger.exception("Failed to persist Google user")
         return jsonify({"ok": False, "error": "Unable to persist user"}), 500
-    finally:
-        db.close()
 
 
 @app.route("/api/logout", methods=["POST"])
 def api_logout():
-    db = SessionLocal()
-    try:
-        _require_user(db)
-        _revoke_current_token(db)
-        db.commit()
-        response = jsonify({"ok": True})
-        response.delete_cookie("bnd_session")
-        response.headers["Cache-Control"] = "no-store"
-        return response
-    except Exception:
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    db = get_db()
+    _require_user(db)
+    _revoke_current_token(db)
+    db.commit()
+    response = jsonify({"ok": True})
+    response.delete_cookie("bnd_session")
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 # --- Session APIs ---
 def _ensure_member(db, session_id: str, uid: str):
-    return db.query(Member).filter_by(session_id=session_id, uid=uid).first()
+    # primary-key get: repeat lookups within a request come from the identity map
+    return db.get(Member, (session_id, uid))
 
 
-@app.route("/api/sessions", methods=["POST"])
-def api_create_session():
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        title = (data.get("title") or "Untitled session").strip()[:200]
-        required_names = data.get("requiredNames") or data.get("maxNames") or 10
-        name_focus = (data.get("nameFocus") or "mix").strip().lower()
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-        try:
-            required_names = int(required_names)
-        except (TypeError, ValueError):
-            return jsonify({"ok": False, "error": "requiredNames must be a number"}), 400
+def _is_member(db, session_id: str, uid: str) -> bool:
+    return bool(db.execute(select(exists().where(
+        Member.session_id == session_id,
+        Member.uid == uid,
+    ))).scalar())
 
-        if required_names < 4 or required_names > 100:
-            return jsonify({"ok": False, "error": "requiredNames must be between 4 and 100"}), 400
 
-        if name_focus == "mix" and required_names % 4 != 0:
-            return jsonify({"ok": False, "error": "For mix sessions, required names must be a multiple of 4"}), 400
+def _is_session_owner(db, session_id: str, uid: str) -> bool:
+    return bool(db.execute(select(exists().where(
+        Member.session_id == session_id,
+        Member.uid == uid,
+        Member.role == "owner",
+    ))).scalar())
 
-        if name_focus in {"girl", "boy"} and required_names % 4 not in {0, 2}:
-            return jsonify({"ok": False, "error": "For single-gender sessions, required names must be an even number"}), 400
 
-        if name_focus not in {"girl", "boy", "mix"}:
-            name_focus = "mix"
+def _has_tiebreak_vote(db, session_id: str, uid: str) -> bool:
+    return bool(db.execute(select(exists().where(
+        TieBreakVote.session_id == session_id,
+        TieBreakVote.rater_uid == uid,
+    ))).scalar())
 
-        sid = _uuid()
-        owner_token = _uuid()
-        voter_token = _uuid()
 
-        session = Session(
-            id=sid,
-            title=title or "Untitled session",
-            created_by=email,
-            max_owners=1,
-            max_names=required_names,
-            name_focus=name_focus,
-            status="active",
-            invite_owner_token=owner_token,
-            invite_voter_token=voter_token,
-            template_ready=False,
+@app.route("/api/sessions", methods=["POST"])
+def api_create_session():
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    title = (data.get("title") or "Untitled session").strip()[:200]
+    required_names = data.get("requiredNames") or data.get("maxNames") or 10
+    name_focus = (data.get("nameFocus") or "mix").strip().lower()
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+    try:
+        required_names = int(required_names)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "requiredNames must be a number"}), 400
+
+    if required_names < 4 or required_names > 100:
+        return jsonify({"ok": False, "error": "requiredNames must be between 4 and 100"}), 400
+
+    if name_focus == "mix" and required_names % 4 != 0:
+        return jsonify({"ok": False, "error": "For mix sessions, required names must be a multiple of 4"}), 400
+
+    if name_focus in {"girl", "boy"} and required_names % 4 not in {0, 2}:
+        return jsonify({"ok": False, "error": "For single-gender sessions, required names must be an even number"}), 400
+
+    if name_focus not in {"girl", "boy", "mix"}:
+        name_focus = "mix"
+
+    # one entropy read for the id and both invite tokens (32 hex chars each)
+    raw = secrets.token_bytes(48)
+    sid = raw[:16].hex()
+    owner_token = raw[16:32].hex()
+    voter_token = raw[32:].hex()
+
+    session = Session(
+        id=sid,
+        title=title or "Untitled session",
+        created_by=email,
+        max_owners=1,
+        owners_count=1,
+        max_names=required_names,
+        name_focus=name_focus,
+        status="active",
+        invite_owner_token=owner_token,
+        invite_voter_token=voter_token,
+        template_ready=False,
+    )
+    member = Member(session_id=sid, uid=email, role="owner")
+    owner_state = OwnerListState(session_id=sid, owner_uid=email, status="draft")
+
+    try:
+        db.add(session)
+        db.add(member)
+        db.add(owner_state)
+        db.flush()
+        _log_activity(
+            db,
+            actor=email,
+            action="session.create",
+            session_id=sid,
+            details={
+                "title": session.title,
+                "requiredNames": required_names,
+                "nameFocus": name_focus,
+                "invitedCount": 0,
+            },
         )
-        member = Member(session_id=sid, uid=email, role="owner")
-        owner_state = OwnerListState(session_id=sid, owner_uid=email, status="draft")
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to create session")
+        return jsonify({"ok": False, "error": "Unable to create session"}), 500
+
+    activity_ts = _session_activity_timestamp(db, sid)
+    payload = _serialize_session_for_user(
+        session,
+        role="owner",
+        owners=1,
+        max_owners=1,
+        activity_ts=activity_ts,
+    )
+    payload.update({
+        "inviteOwnerToken": owner_token,
+        "inviteVoterToken": voter_token,
+        "requiredNames": required_names,
+        "nameFocus": name_focus,
+        "ownerIds": [email],
+        "voterIds": [],
+        "createdBy": email,
+        "viewerRole": "owner",
+        "invitesLocked": False,
+        "templateReady": False,
+        "listStates": {
+            email: {
+                "status": "draft",
+                "submittedAt": None,
+                "updatedAt": now_utc(),
+            }
+        },
+    })
+    return jsonify({"ok": True, "session": payload})
 
-        try:
-            db.add(session)
-            db.add(member)
-            db.add(owner_state)
-            db.flush()
-            _log_activity(
-                db,
-                actor=email,
-                action="session.create",
-                session_id=sid,
-                details={
-                    "title": session.title,
-                    "requiredNames": required_names,
-                    "nameFocus": name_focus,
-                    "invitedCount": 0,
-                },
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to create session", exc)
-            return jsonify({"ok": False, "error": "Unable to create session"}), 500
-
-        activity_ts = _session_activity_timestamp(db, sid)
-        payload = _serialize_session_for_user(
+
+@app.route("/api/sessions", methods=["GET"])
+def api_list_sessions():
+    db = get_db()
+    user = _require_user(db)
+    request_email = _normalize_email(request.args.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    if not email:
+        return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
+    # plain column rows (no ORM hydration); each row carries the session
+    # fields, the viewer's role and the viewer's own list state
+    memberships = db.execute(
+        select(
+            *_SESSION_LIST_COLUMNS,
+            Member.role,
+            OwnerListState.status.label("list_status"),
+            OwnerListState.submitted_at.label("list_submitted_at"),
+        )
+        .join(Member, Member.session_id == Session.id)
+        .outerjoin(
+            OwnerListState,
+            (OwnerListState.session_id == Session.id) & (OwnerListState.owner_uid == email),
+        )
+        .where(Member.uid == email)
+        .order_by(Session.created_at.desc())
+    ).all()
+    session_ids = [row.id for row in memberships]
+    if not session_ids:
+        return jsonify({"ok": True, "active": [], "archived": []})
+
+    activity_map = _session_activity_timestamps(db, session_ids)
+
+    active, archived = [], []
+    for session in memberships:
+        activity_ts = activity_map.get(session.id)
+        record = _serialize_session_for_user(
             session,
-            role="owner",
-            owners=1,
+            role=session.role,
+            owners=session.owners_count,
             max_owners=1,
             activity_ts=activity_ts,
         )
-        payload.update({
-            "inviteOwnerToken": owner_token,
-            "inviteVoterToken": voter_token,
-            "requiredNames": required_names,
-            "nameFocus": name_focus,
-            "ownerIds": [email],
-            "voterIds": [],
-            "createdBy": email,
-            "viewerRole": "owner",
-            "invitesLocked": False,
-            "templateReady": False,
-            "listStates": {
-                email: {
-                    "status": "draft",
-                    "submittedAt": None,
-                    "updatedAt": _isoformat(now_utc()),
-                }
-            },
-        })
-        return jsonify({"ok": True, "session": payload})
-    finally:
-        db.close()
+        if session.list_status:
+            record["listStatus"] = session.list_status
+            record["listSubmittedAt"] = session.list_submitted_at
+        else:
+            record["listStatus"] = "draft"
+            record["listSubmittedAt"] = None
+        if session.role == "owner":
+            record["inviteOwnerToken"] = session.invite_owner_token
+            record["inviteVoterToken"] = session.invite_voter_token
+        (archived if session.status == "archived" else active).append(record)
 
+    return jsonify({"ok": True, "active": active, "archived": archived})
 
-@app.route("/api/sessions", methods=["GET"])
-def api_list_sessions():
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        request_email = _normalize_email(request.args.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        if not email:
-            return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
-        memberships = (
-            db.query(Session, Member)
-            .join(Member, Member.session_id == Session.id)
-            .filter(Member.uid == email)
-            .order_by(Session.created_at.desc())
-            .all()
-        )
-        session_ids = [s.id for s, _ in memberships]
-        if not session_ids:
-            return jsonify({"ok": True, "active": [], "archived": []})
-
-        owner_counts = {
-            sid: count
-            for sid, count in db.query(Member.session_id, func.count())
-            .filter(Member.session_id.in_(session_ids), Member.role == "owner")
-            .group_by(Member.session_id)
-        }
 
-        state_rows = (
-            db.query(OwnerListState)
-            .filter(OwnerListState.session_id.in_(session_ids))
-            .all()
-        )
-        state_map = {}
-        for state in state_rows:
-            state_map.setdefault(state.session_id, {})[state.owner_uid] = state
-
-        active, archived = [], []
-        for session, member in memberships:
-            activity_ts = _session_activity_timestamp(db, session.id)
-            record = _serialize_session_for_user(
-                session,
-                role=member.role,
-                owners=owner_counts.get(session.id, 0),
-                max_owners=1,
-                activity_ts=activity_ts,
-            )
-            state = state_map.get(session.id, {}).get(member.uid)
-            if state:
-                record["listStatus"] = state.status
-                record["listSubmittedAt"] = _isoformat(state.submitted_at)
-            else:
-                record["listStatus"] = "draft"
-                record["listSubmittedAt"] = None
-            record["maxNames"] = session.max_names or 10
-            record["requiredNames"] = session.max_names or 10
-            record["nameFocus"] = session.name_focus or "mix"
-            record["invitesLocked"] = bool(session.invites_locked)
-            if member.role == "owner":
-                record["inviteOwnerToken"] = session.invite_owner_token
-                record["inviteVoterToken"] = session.invite_voter_token
-            (archived if session.status == "archived" else active).append(record)
-
-        return jsonify({"ok": True, "active": active, "archived": archived})
-    finally:
-        db.close()
+def _session_rows_query(sid: str):
+    """Scores ('S') and list items ('L') for a session as one UNION ALL.
+
+    Rows are (kind, owner, name, value, rater, created_at); list rows come
+    ordered by owner and self rank.
+    """
+    score_rows = select(
+        literal("S").label("kind"),
+        Score.list_owner_uid.label("owner_uid"),
+        Score.name.label("name"),
+        Score.score_value.label("value"),
+        Score.rater_uid.label("rater_uid"),
+        Score.created_at.label("created_at"),
+    ).where(Score.session_id == sid)
+    list_rows = select(
+        literal("L"),
+        ListItem.owner_uid,
+        ListItem.name,
+        ListItem.self_rank,
+        null(),
+        null(),
+    ).where(ListItem.session_id == sid)
+    combined = union_all(score_rows, list_rows)
+    cols = combined.selected_columns
+    return combined.order_by(cols.kind, cols.owner_uid, cols.value)
 
 
 @app.route("/api/sessions/<sid>", methods=["GET"])
@@ -1782,1157 +2456,1080 @@ def api_get_session(sid):
     if not sid:
         return jsonify({"ok": False, "error": "Session id required"}), 400
 
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        request_email = _normalize_email(request.args.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        if not email:
-            return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        member = _ensure_member(db, sid, email) if email else None
-        if email and not member:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-
-        members = db.query(Member).filter_by(session_id=sid).all()
-        include_tokens = bool(member and member.role == "owner")
-        session_doc = _serialize_session_doc(session, members, include_tokens=include_tokens)
-
-        state_rows = db.query(OwnerListState).filter_by(session_id=sid).all()
-        state_map = {
-            state.owner_uid: {
-                "status": state.status,
-                "submittedAt": _isoformat(state.submitted_at),
-                "updatedAt": _isoformat(state.updated_at),
-                "slotCount": state.slot_count or 0,
-            }
-            for state in state_rows
+    db = get_db()
+    user = _require_user(db)
+    request_email = _normalize_email(request.args.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    if not email:
+        return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
+    session = db.execute(
+        select(Session)
+        .options(selectinload(Session.members), selectinload(Session.owner_states))
+        .where(Session.id == sid)
+    ).scalar_one_or_none()
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+
+    members = session.members
+    member = next((row for row in members if row.uid == email), None)
+    if not member:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
+
+    include_tokens = bool(member and member.role == "owner")
+    session_doc = _serialize_session_doc(session, members, include_tokens=include_tokens)
+
+    state_map = {
+        state.owner_uid: {
+            "status": state.status,
+            "submittedAt": state.submitted_at,
+            "updatedAt": state.updated_at,
+            "slotCount": state.slot_count or 0,
         }
-        session_doc["listStates"] = state_map
-        session_doc["viewerRole"] = member.role if member else None
-        session_doc["invitesLocked"] = bool(session.invites_locked)
-        tie_info = session_doc.get("tieBreak", {})
-        if tie_info.get("active") and email:
-            submitted = bool(
-                db.query(TieBreakVote)
-                .filter_by(session_id=sid, rater_uid=email)
-                .first()
-            )
-            tie_info["submitted"] = submitted
-        else:
-            tie_info.setdefault("submitted", False)
-        session_doc["tieBreak"] = tie_info
-        if include_tokens:
-            invite_origin = _compute_invite_origin(request)
-            invite_rows = (
-                db.query(SessionInvite)
-                .filter_by(session_id=sid)
-                .order_by(SessionInvite.created_at.asc())
-                .all()
-            )
-            session_doc["pendingInvites"] = [
-                {
-                    "email": row.email,
-                    "role": row.role,
-                    "sentAt": _isoformat(row.created_at),
-                    "link": _build_invite_link(
-                        invite_origin,
-                        sid,
-                        token=row.token,
-                        existing_user=False,
-                        invite_email=row.email,
-                    ),
-                }
-                for row in invite_rows
-            ]
-
-        list_rows = (
-            db.query(ListItem)
+        for state in session.owner_states
+    }
+    session_doc["listStates"] = state_map
+    session_doc["viewerRole"] = member.role if member else None
+    session_doc["invitesLocked"] = bool(session.invites_locked)
+    tie_info = session_doc.get("tieBreak", {})
+    if tie_info.get("active") and email:
+        submitted = _has_tiebreak_vote(db, sid, email)
+        tie_info["submitted"] = submitted
+    else:
+        tie_info.setdefault("submitted", False)
+    session_doc["tieBreak"] = tie_info
+    if include_tokens:
+        invite_origin = _compute_invite_origin(request)
+        invite_rows = (
+            db.query(SessionInvite)
             .filter_by(session_id=sid)
-            .order_by(ListItem.owner_uid, ListItem.self_rank)
+            .order_by(SessionInvite.created_at.asc())
             .all()
         )
-
-        metadata_map = _get_name_metadata_map(db, [row.name for row in list_rows])
-
-        lists = {}
-        for row in list_rows:
-            entry = lists.setdefault(
-                row.owner_uid,
-                {"names": [], "selfRanks": {}, "status": state_map.get(row.owner_uid, {}).get("status", "draft"), "facts": {}},
-            )
-            entry["names"].append(row.name)
-            entry["selfRanks"][row.name] = row.self_rank
-            fact_value = metadata_map.get(_normalize_name_key(row.name))
-            if fact_value:
-                entry.setdefault("facts", {})[row.name] = fact_value
-
-        # ensure every owner appears in lists even if empty
-        for owner_uid, state in state_map.items():
-            lists.setdefault(
-                owner_uid,
-                {"names": [], "selfRanks": {}, "status": state.get("status", "draft"), "facts": {}},
-            )
-
-        viewer_uid = email
-        filtered_lists = {}
-        for owner_uid, data in lists.items():
-            status = data.get("status", "draft")
-            if owner_uid != viewer_uid and status != "submitted":
-                continue
-            data.setdefault("facts", {})
-            filtered_lists[owner_uid] = data
-
-        scores_rows = db.query(Score).filter_by(session_id=sid).all()
-        scores = [
+        session_doc["pendingInvites"] = [
             {
-                "listOwnerUid": row.list_owner_uid,
-                "raterUid": row.rater_uid,
-                "name": row.name,
-                "scoreValue": row.score_value,
-                "createdAt": _isoformat(row.created_at),
+                "email": row.email,
+                "role": row.role,
+                "sentAt": row.created_at,
+                "link": _build_invite_link(
+                    invite_origin,
+                    sid,
+                    token=row.token,
+                    existing_user=False,
+                    invite_email=row.email,
+                ),
             }
-            for row in scores_rows
+            for row in invite_rows
         ]
 
-        if not session.invites_locked and session.status != "completed":
-            viewer_uid = member.uid if member else None
-            if viewer_uid:
-                scores = [score for score in scores if score["raterUid"] == viewer_uid]
-            else:
-                scores = []
+    # lists and scores come back from one UNION ALL; plain column rows keep
+    # ORM hydration out of this read-only view; other owners' lists are only
+    # visible once submitted, so hidden rows are dropped as they stream in
+    visible_owners = {
+        owner_uid for owner_uid, state in state_map.items()
+        if owner_uid == email or state["status"] == "submitted"
+    }
+    list_rows = []
+    scores = []
+    for kind, owner_uid, name, value, rater_uid, created_at in db.execute(_session_rows_query(sid)):
+        if kind == "L":
+            if owner_uid == email or owner_uid in visible_owners:
+                list_rows.append((owner_uid, name, value))
+        else:
+            scores.append({
+                "listOwnerUid": owner_uid,
+                "raterUid": rater_uid,
+                "name": name,
+                "scoreValue": value,
+                "createdAt": created_at,
+            })
 
+    metadata_map = _get_name_metadata_map(db, [name for _, name, _ in list_rows])
+
+    filtered_lists = {}
+    for owner_uid, name, self_rank in list_rows:
+        entry = filtered_lists.get(owner_uid)
+        if entry is None:
+            entry = filtered_lists[owner_uid] = {
+                "names": [],
+                "selfRanks": {},
+                "status": state_map.get(owner_uid, {}).get("status", "draft"),
+                "facts": {},
+            }
+        entry["names"].append(name)
+        entry["selfRanks"][name] = self_rank
+        fact_value = metadata_map.get(_normalize_name_key(name))
+        if fact_value:
+            entry["facts"][name] = fact_value
+
+    # visible owners appear in lists even if empty
+    for owner_uid in visible_owners.difference(filtered_lists):
+        filtered_lists[owner_uid] = {
+            "names": [],
+            "selfRanks": {},
+            "status": state_map[owner_uid].get("status", "draft"),
+            "facts": {},
+        }
+
+    if not session.invites_locked and session.status != "completed":
         viewer_uid = member.uid if member else None
-        message_rows = []
         if viewer_uid:
-            message_rows = (
-                db.query(Message)
-                .filter_by(session_id=sid)
-                .order_by(Message.created_at.desc())
-                .limit(200)
-                .all()
-            )
-
-        def _message_visible(row: Message) -> bool:
-            if row.recipient_uid is None:
-                return True
-            return row.recipient_uid == viewer_uid or row.sender_uid == viewer_uid
+            scores = [score for score in scores if score["raterUid"] == viewer_uid]
+        else:
+            scores = []
 
-        messages = [
-            _serialize_message(row)
-            for row in reversed(message_rows)
-            if _message_visible(row)
-        ]
+    viewer_uid = member.uid if member else None
+    messages = []
+    if viewer_uid:
+        messages = [_serialize_message(row) for row in _visible_messages(db, sid, viewer_uid)]
 
-        return jsonify({
-            "ok": True,
-            "session": session_doc,
-            "lists": filtered_lists,
-            "scores": scores,
-            "viewerRole": session_doc.get("viewerRole"),
-            "messages": messages,
-        })
-    finally:
-        db.close()
+    return jsonify({
+        "ok": True,
+        "session": session_doc,
+        "lists": filtered_lists,
+        "scores": scores,
+        "viewerRole": session_doc.get("viewerRole"),
+        "messages": messages,
+    })
 
 
 @app.route("/api/sessions/join", methods=["POST"])
 def api_join_session():
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        token = (data.get("token") or "").strip()
-
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-        if not token:
-            return jsonify({"ok": False, "error": "Invite token required"}), 400
-
-        invite_query = db.query(SessionInvite).filter(SessionInvite.token == token)
-        request_sid = data.get("sid")
-        if request_sid:
-            invite_query = invite_query.filter(SessionInvite.session_id == request_sid)
-        invite = invite_query.first()
-        if not invite:
-            return jsonify({"ok": False, "error": "Invalid or expired invite"}), 404
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    token = (data.get("token") or "").strip()
 
-        session = db.query(Session).filter_by(id=invite.session_id).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+    if not token:
+        return jsonify({"ok": False, "error": "Invite token required"}), 400
+
+    # invite, session and the caller's existing role (if any) in one read
+    invite_query = (
+        select(SessionInvite, Session, Member.role)
+        .outerjoin(Session, Session.id == SessionInvite.session_id)
+        .outerjoin(Member, (Member.session_id == SessionInvite.session_id) & (Member.uid == email))
+        .where(SessionInvite.token == token)
+    )
+    request_sid = data.get("sid")
+    if request_sid:
+        invite_query = invite_query.where(SessionInvite.session_id == request_sid)
+    # locking read: a concurrent lock-invites has to wait for this join to
+    # commit (or this join sees its committed invites_locked flag)
+    row = db.execute(invite_query.limit(1).with_for_update()).first()
+    if not row:
+        return jsonify({"ok": False, "error": "Invalid or expired invite"}), 404
+
+    invite, session, existing_role = row
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
 
-        sid = session.id
+    sid = session.id
 
-        if session.status == "archived":
-            return jsonify({"ok": False, "error": "Session is archived"}), 409
+    if session.status == "archived":
+        return jsonify({"ok": False, "error": "Session is archived"}), 409
 
-        target_email = _normalize_email(invite.email)
-        if target_email and target_email != email:
-            return jsonify({"ok": False, "error": "Invite email mismatch"}), 403
+    target_email = _normalize_email(invite.email)
+    if target_email and target_email != email:
+        return jsonify({"ok": False, "error": "Invite email mismatch"}), 403
 
-        existing = _ensure_member(db, sid, email)
-        if session.invites_locked and not existing:
-            return jsonify({"ok": False, "error": "Invites are locked for this session"}), 409
+    if session.invites_locked and not existing_role:
+        return jsonify({"ok": False, "error": "Invites are locked for this session"}), 409
 
-        if existing:
-            _ensure_owner_list_state(db, sid, email)
-            db.query(SessionInvite).filter_by(session_id=sid, email=email).delete()
-            _log_activity(
-                db,
-                actor=email,
-                action="session.join",
-                session_id=sid,
-                details={"role": existing.role, "method": "rejoin"},
-            )
-            db.commit()
-            return jsonify({"ok": True, "role": existing.role, "sid": sid})
+    # state row and invite cleanup go out as plain DML; ORM rows (member,
+    # notification, activity) are flushed once by the single commit
+    if existing_role:
+        _insert_owner_list_state(db, sid, email)
+        db.query(SessionInvite).filter_by(session_id=sid, email=email).delete(synchronize_session=False)
+        _log_activity(
+            db,
+            actor=email,
+            action="session.join",
+            session_id=sid,
+            details={"role": existing_role, "method": "rejoin"},
+        )
+        db.commit()
+        return jsonify({"ok": True, "role": existing_role, "sid": sid})
 
-        try:
-            db.add(Member(session_id=sid, uid=email, role="participant"))
-            db.flush()
-            _ensure_owner_list_state(db, sid, email)
-            db.query(SessionInvite).filter_by(session_id=sid, email=email).delete()
-            _create_notification(
-                db,
-                user_email=session.created_by,
-                session_id=sid,
-                type_="participant_joined",
-                payload={"sid": sid, "email": email},
-            )
-            _log_activity(
-                db,
-                actor=email,
-                action="session.join",
-                session_id=sid,
-                details={"role": "participant", "method": "invite"},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to join session", exc)
-            return jsonify({"ok": False, "error": "Unable to join session"}), 500
+    try:
+        db.add(Member(session_id=sid, uid=email, role="participant"))
+        _insert_owner_list_state(db, sid, email)
+        db.query(SessionInvite).filter_by(session_id=sid, email=email).delete(synchronize_session=False)
+        _create_notification(
+            db,
+            user_email=session.created_by,
+            session_id=sid,
+            type_="participant_joined",
+            payload={"sid": sid, "email": email},
+        )
+        _log_activity(
+            db,
+            actor=email,
+            action="session.join",
+            session_id=sid,
+            details={"role": "participant", "method": "invite"},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to join session")
+        return jsonify({"ok": False, "error": "Unable to join session"}), 500
 
-        return jsonify({"ok": True, "role": "participant", "sid": sid})
-    finally:
-        db.close()
+    return jsonify({"ok": True, "role": "participant", "sid": sid})
 
 
 @app.route("/api/sessions/<sid>/participants", methods=["POST"])
 def api_add_participants(sid):
-    db = SessionLocal()
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    owner_email = _normalize_email(user.email)
+    if request_email and request_email != owner_email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    participants = data.get("participants") or data.get("invites") or []
+
+    if not owner_email or not _is_valid_email(owner_email):
+        return jsonify({"ok": False, "error": "Valid owner email required"}), 400
+
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    if session.created_by != owner_email:
+        return jsonify({"ok": False, "error": "Only the session owner can invite participants"}), 403
+    if session.status == "archived":
+        return jsonify({"ok": False, "error": "Session archived"}), 409
+    if not session.template_ready:
+        return jsonify({"ok": False, "error": "Create your list template before inviting participants."}), 409
+
+    cleaned_specs = []
+    seen = set()
+    for item in participants:
+        invite_email = None
+        role = None
+        if isinstance(item, dict):
+            invite_email = _normalize_email(item.get("email"))
+            role = item.get("role")
+        else:
+            invite_email = _normalize_email(item)
+        if not invite_email or invite_email == owner_email:
+            continue
+        # duplicate check first: the first occurrence was already validated
+        if invite_email in seen:
+            return jsonify({"ok": False, "error": f"Duplicate invite: {invite_email}"}), 400
+        if not _is_valid_email(invite_email):
+            return jsonify({"ok": False, "error": f"Invalid invite email: {invite_email}"}), 400
+        seen.add(invite_email)
+        cleaned_specs.append({"email": invite_email, "role": role})
+
+    origin = _compute_invite_origin(request)
     try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        owner_email = _normalize_email(user.email)
-        if request_email and request_email != owner_email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        participants = data.get("participants") or data.get("invites") or []
-
-        if not owner_email or not _is_valid_email(owner_email):
-            return jsonify({"ok": False, "error": "Valid owner email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        if session.created_by != owner_email:
-            return jsonify({"ok": False, "error": "Only the session owner can invite participants"}), 403
-        if session.status == "archived":
-            return jsonify({"ok": False, "error": "Session archived"}), 409
-        if not session.template_ready:
-            return jsonify({"ok": False, "error": "Create your list template before inviting participants."}), 409
-
-        cleaned_specs = []
-        seen = set()
-        for item in participants:
-            invite_email = None
-            role = None
-            if isinstance(item, dict):
-                invite_email = _normalize_email(item.get("email"))
-                role = item.get("role")
-            else:
-                invite_email = _normalize_email(item)
-            if not invite_email or invite_email == owner_email:
-                continue
-            if not _is_valid_email(invite_email):
-                return jsonify({"ok": False, "error": f"Invalid invite email: {invite_email}"}), 400
-            if invite_email in seen:
-                return jsonify({"ok": False, "error": f"Duplicate invite: {invite_email}"}), 400
-            seen.add(invite_email)
-            cleaned_specs.append({"email": invite_email, "role": role})
-
-        origin = _compute_invite_origin(request)
-        try:
-            results = _invite_participants(
-                db,
-                session=session,
-                owner_email=owner_email,
-                invite_specs=cleaned_specs,
-                origin=origin,
-            )
-            _log_activity(
-                db,
-                actor=owner_email,
-                action="participants.invite",
-                session_id=sid,
-                details={"count": len(results)},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to invite participants", exc)
-            return jsonify({"ok": False, "error": "Unable to invite participants"}), 500
+        results = _invite_participants(
+            db,
+            session=session,
+            owner_email=owner_email,
+            invite_specs=cleaned_specs,
+            origin=origin,
+        )
+        _log_activity(
+            db,
+            actor=owner_email,
+            action="participants.invite",
+            session_id=sid,
+            details={"count": len(results)},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to invite participants")
+        return jsonify({"ok": False, "error": "Unable to invite participants"}), 500
 
-        return jsonify({"ok": True, "results": results})
-    finally:
-        db.close()
+    return jsonify({"ok": True, "results": results})
 
 
 @app.route("/api/sessions/<sid>/tiebreak", methods=["GET"])
 def api_tiebreak_status(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        member = _ensure_member(db, sid, user.email)
-        if not member and user.email != session.created_by:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-
-        names = _load_json_array(session.tiebreak_names) if session.tiebreak_active else []
-        submitted = False
-        if session.tiebreak_active and member:
-            submitted = bool(
-                db.query(TieBreakVote)
-                .filter_by(session_id=sid, rater_uid=user.email)
-                .first()
-            )
+    db = get_db()
+    user = _require_user(db)
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
 
-        payload = {
-            "active": bool(session.tiebreak_active),
-            "names": names,
-            "submitted": submitted,
-            "finalWinners": _load_json_array(session.final_winners),
-        }
-        return jsonify({"ok": True, "tieBreak": payload})
-    finally:
-        db.close()
+    member = _ensure_member(db, sid, user.email)
+    if not member and user.email != session.created_by:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
+
+    names = _load_json_array(session.tiebreak_names) if session.tiebreak_active else []
+    submitted = False
+    if session.tiebreak_active and member:
+        submitted = _has_tiebreak_vote(db, sid, user.email)
+
+    payload = {
+        "active": bool(session.tiebreak_active),
+        "names": names,
+        "submitted": submitted,
+        "finalWinners": _load_json_array(session.final_winners),
+    }
+    return jsonify({"ok": True, "tieBreak": payload})
 
 
 @app.route("/api/sessions/<sid>/tiebreak/start", methods=["POST"])
 def api_tiebreak_start(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        email = _normalize_email(user.email)
-        if session.created_by != email:
-            return jsonify({"ok": False, "error": "Only the owner can start a tie-break"}), 403
-        if session.status == "completed":
-            return jsonify({"ok": False, "error": "Session already completed"}), 409
-        if not session.invites_locked:
-            return jsonify({"ok": False, "error": "Close invites before starting a tie-break"}), 409
-        if session.tiebreak_active:
-            return jsonify({"ok": False, "error": "Tie-break already active"}), 409
-
-        totals = _score_totals(db, sid)
-        tied_names = _first_place_tie_names(totals)
-        if len(tied_names) < 2:
-            return jsonify({"ok": False, "error": "No tie to resolve"}), 409
-
-        session.tiebreak_active = True
-        session.tiebreak_names = json.dumps(tied_names)
-        session.final_winners = None
-        db.query(TieBreakVote).filter_by(session_id=sid).delete(synchronize_session=False)
-
-        for member in db.query(Member).filter_by(session_id=sid).all():
-            if member.uid == email:
-                continue
-            _create_notification(
-                db,
-                user_email=member.uid,
-                session_id=sid,
-                type_="tiebreak_started",
-                payload={"sid": sid, "names": tied_names},
-            )
+    db = get_db()
+    user = _require_user(db)
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+
+    email = _normalize_email(user.email)
+    if session.created_by != email:
+        return jsonify({"ok": False, "error": "Only the owner can start a tie-break"}), 403
+    if session.status == "completed":
+        return jsonify({"ok": False, "error": "Session already completed"}), 409
+    if not session.invites_locked:
+        return jsonify({"ok": False, "error": "Close invites before starting a tie-break"}), 409
+    if session.tiebreak_active:
+        return jsonify({"ok": False, "error": "Tie-break already active"}), 409
+
+    totals = _score_totals(db, sid)
+    tied_names = _first_place_tie_names(totals)
+    if len(tied_names) < 2:
+        return jsonify({"ok": False, "error": "No tie to resolve"}), 409
+
+    session.tiebreak_active = True
+    session.tiebreak_names = json.dumps(tied_names)
+    session.final_winners = None
+    db.query(TieBreakVote).filter_by(session_id=sid).delete(synchronize_session=False)
+
+    _notify_many(
+        db,
+        _other_member_uids(db, sid, email),
+        session_id=sid,
+        type_="tiebreak_started",
+        payload={"sid": sid, "names": tied_names},
+    )
 
-        _log_activity(
-            db,
-            actor=email,
-            action="tiebreak.start",
-            session_id=sid,
-            details={"names": tied_names},
-        )
-        db.commit()
-        return jsonify({"ok": True, "names": tied_names})
-    finally:
-        db.close()
+    _log_activity(
+        db,
+        actor=email,
+        action="tiebreak.start",
+        session_id=sid,
+        details={"names": tied_names},
+    )
+    db.commit()
+    return jsonify({"ok": True, "names": tied_names})
 
 
 @app.route("/api/sessions/<sid>/tiebreak/votes", methods=["POST"])
 def api_tiebreak_vote(sid):
-    db = SessionLocal()
+    db = get_db()
+    user = _require_user(db)
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    if not session.tiebreak_active:
+        return jsonify({"ok": False, "error": "Tie-break is not active"}), 409
+
+    member = _ensure_member(db, sid, user.email)
+    if not member:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
+
+    data = _json_body()
+    ranks = data.get("ranks")
+    names = _load_json_array(session.tiebreak_names)
+    if not isinstance(ranks, dict) or not names:
+        return jsonify({"ok": False, "error": "ranks object required"}), 400
+
     try:
-        user = _require_user(db)
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        if not session.tiebreak_active:
-            return jsonify({"ok": False, "error": "Tie-break is not active"}), 409
-
-        member = _ensure_member(db, sid, user.email)
-        if not member:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-
-        data = request.get_json(force=True) or {}
-        ranks = data.get("ranks")
-        names = _load_json_array(session.tiebreak_names)
-        if not isinstance(ranks, dict) or not names:
-            return jsonify({"ok": False, "error": "ranks object required"}), 400
+        parsed = {name: int(ranks[name]) for name in names if name in ranks}
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "Ranks must be integers"}), 400
 
-        try:
-            parsed = {name: int(ranks[name]) for name in names if name in ranks}
-        except (TypeError, ValueError):
-            return jsonify({"ok": False, "error": "Ranks must be integers"}), 400
+    if len(parsed) != len(names):
+        return jsonify({"ok": False, "error": "Rank every name"}), 400
 
-        if len(parsed) != len(names):
-            return jsonify({"ok": False, "error": "Rank every name"}), 400
+    values = list(parsed.values())
+    limit = len(names)
+    if any(value < 1 or value > limit for value in values):
+        return jsonify({"ok": False, "error": f"Ranks must be between 1 and {limit}"}), 400
+    if len(set(values)) != len(values):
+        return jsonify({"ok": False, "error": "Use each rank only once"}), 400
 
-        values = list(parsed.values())
-        limit = len(names)
-        if any(value < 1 or value > limit for value in values):
-            return jsonify({"ok": False, "error": f"Ranks must be between 1 and {limit}"}), 400
-        if len(set(values)) != len(values):
-            return jsonify({"ok": False, "error": "Use each rank only once"}), 400
+    db.query(TieBreakVote).filter_by(session_id=sid, rater_uid=user.email).delete(synchronize_session=False)
+    now = now_utc()
+    for name, value in parsed.items():
+        db.add(TieBreakVote(session_id=sid, rater_uid=user.email, name=name, rank=value, created_at=now))
+
+    _log_activity(
+        db,
+        actor=user.email,
+        action="tiebreak.vote",
+        session_id=sid,
+        details={"names": names},
+    )
+    db.commit()
+    return jsonify({"ok": True})
 
-        db.query(TieBreakVote).filter_by(session_id=sid, rater_uid=user.email).delete(synchronize_session=False)
-        now = now_utc()
-        for name, value in parsed.items():
-            db.add(TieBreakVote(session_id=sid, rater_uid=user.email, name=name, rank=value, created_at=now))
 
+@app.route("/api/sessions/<sid>/tiebreak/close", methods=["POST"])
+def api_tiebreak_close(sid):
+    db = get_db()
+    user = _require_user(db)
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+
+    email = _normalize_email(user.email)
+    if session.created_by != email:
+        return jsonify({"ok": False, "error": "Only the owner can close the tie-break"}), 403
+    if not session.tiebreak_active:
+        winners = _load_json_array(session.final_winners)
+        return jsonify({"ok": True, "winners": winners, "alreadyClosed": True})
+
+    names = _load_json_array(session.tiebreak_names)
+    votes = db.query(TieBreakVote).filter_by(session_id=sid).all()
+    totals = {name: 0 for name in names}
+    if votes:
+        for row in votes:
+            if row.name in totals:
+                totals[row.name] += row.rank
+    tied = names if not votes else _first_place_tie_names(totals)
+    winners = tied if tied else names
+
+    session.final_winners = json.dumps(winners)
+    session.tiebreak_active = False
+    session.tiebreak_names = None
+    session.status = "completed"
+
+    _notify_many(
+        db,
+        _other_member_uids(db, sid, email),
+        session_id=sid,
+        type_="tiebreak_closed",
+        payload={"sid": sid, "winners": winners},
+    )
+
+    _log_activity(
+        db,
+        actor=email,
+        action="tiebreak.close",
+        session_id=sid,
+        details={"winners": winners},
+    )
+    db.commit()
+    return jsonify({"ok": True, "winners": winners})
+
+
+@app.route("/api/sessions/<sid>/participants", methods=["DELETE"])
+def api_remove_participant(sid):
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    owner_email = _normalize_email(user.email)
+    if request_email and request_email != owner_email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    target_email = _normalize_email(data.get("participantEmail"))
+
+    if not owner_email or not _is_valid_email(owner_email):
+        return jsonify({"ok": False, "error": "Valid owner email required"}), 400
+    if not target_email or not _is_valid_email(target_email):
+        return jsonify({"ok": False, "error": "Valid participant email required"}), 400
+
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    if session.created_by != owner_email:
+        return jsonify({"ok": False, "error": "Only the session owner can remove participants"}), 403
+    if target_email == session.created_by:
+        return jsonify({"ok": False, "error": "Cannot remove the session owner"}), 400
+
+    db.query(SessionInvite).filter_by(session_id=sid, email=target_email).delete()
+    # the membership delete doubles as the "is a member" check
+    removed = db.query(Member).filter_by(session_id=sid, uid=target_email).delete()
+    if not removed:
         _log_activity(
             db,
-            actor=user.email,
-            action="tiebreak.vote",
+            actor=owner_email,
+            action="participants.remove",
             session_id=sid,
-            details={"names": names},
+            details={"target": target_email, "removed": False},
         )
         db.commit()
-        return jsonify({"ok": True})
-    finally:
-        db.close()
+        return jsonify({"ok": True, "removed": False})
 
-
-@app.route("/api/sessions/<sid>/tiebreak/close", methods=["POST"])
-def api_tiebreak_close(sid):
-    db = SessionLocal()
     try:
-        user = _require_user(db)
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        email = _normalize_email(user.email)
-        if session.created_by != email:
-            return jsonify({"ok": False, "error": "Only the owner can close the tie-break"}), 403
-        if not session.tiebreak_active:
-            winners = _load_json_array(session.final_winners)
-            return jsonify({"ok": True, "winners": winners, "alreadyClosed": True})
-
-        names = _load_json_array(session.tiebreak_names)
-        votes = db.query(TieBreakVote).filter_by(session_id=sid).all()
-        totals = {name: 0 for name in names}
-        if votes:
-            for row in votes:
-                if row.name in totals:
-                    totals[row.name] += row.rank
-        tied = names if not votes else _first_place_tie_names(totals)
-        winners = tied if tied else names
-
-        session.final_winners = json.dumps(winners)
-        session.tiebreak_active = False
-        session.tiebreak_names = None
-        session.status = "completed"
-
-        for member in db.query(Member).filter_by(session_id=sid).all():
-            if member.uid == email:
-                continue
-            _create_notification(
-                db,
-                user_email=member.uid,
-                session_id=sid,
-                type_="tiebreak_closed",
-                payload={"sid": sid, "winners": winners},
-            )
-
+        db.query(Score).filter(
+            (Score.session_id == sid)
+            & ((Score.list_owner_uid == target_email) | (Score.rater_uid == target_email))
+        ).delete()
+        db.query(ListItem).filter_by(session_id=sid, owner_uid=target_email).delete()
+        db.query(OwnerListState).filter_by(session_id=sid, owner_uid=target_email).delete()
+        _create_notification(
+            db,
+            user_email=target_email,
+            session_id=sid,
+            type_="removed_from_session",
+            payload={"sid": sid, "title": session.title},
+        )
         _log_activity(
             db,
-            actor=email,
-            action="tiebreak.close",
+            actor=owner_email,
+            action="participants.remove",
             session_id=sid,
-            details={"winners": winners},
+            details={"target": target_email, "removed": True},
         )
         db.commit()
-        return jsonify({"ok": True, "winners": winners})
-    finally:
-        db.close()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to remove participant")
+        return jsonify({"ok": False, "error": "Unable to remove participant"}), 500
 
+    _recompute_session_status(db, sid)
+    return jsonify({"ok": True, "removed": True})
+
+
+@app.route("/api/sessions/<sid>/lock-invites", methods=["POST"])
+def api_lock_invites(sid):
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    if session.created_by != email:
+        return jsonify({"ok": False, "error": "Only the host can lock invites"}), 403
+    if session.invites_locked:
+        return jsonify({"ok": True, "invitesLocked": True})
+
+    session.invites_locked = True
+    _notify_many(
+        db,
+        _other_member_uids(db, sid, email),
+        session_id=sid,
+        type_="invites_locked",
+        payload={"sid": sid, "title": session.title},
+    )
+    _log_activity(
+        db,
+        actor=email,
+        action="invites.lock",
+        session_id=sid,
+        details={"title": session.title},
+    )
+    db.commit()
+    _recompute_session_status(db, sid)
+    return jsonify({"ok": True, "invitesLocked": True})
 
-@app.route("/api/sessions/<sid>/participants", methods=["DELETE"])
-def api_remove_participant(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        owner_email = _normalize_email(user.email)
-        if request_email and request_email != owner_email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        target_email = _normalize_email(data.get("participantEmail"))
-
-        if not owner_email or not _is_valid_email(owner_email):
-            return jsonify({"ok": False, "error": "Valid owner email required"}), 400
-        if not target_email or not _is_valid_email(target_email):
-            return jsonify({"ok": False, "error": "Valid participant email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        if session.created_by != owner_email:
-            return jsonify({"ok": False, "error": "Only the session owner can remove participants"}), 403
-        if target_email == session.created_by:
-            return jsonify({"ok": False, "error": "Cannot remove the session owner"}), 400
-
-        membership = _ensure_member(db, sid, target_email)
-        if not membership:
-            db.query(SessionInvite).filter_by(session_id=sid, email=target_email).delete()
-            _log_activity(
-                db,
-                actor=owner_email,
-                action="participants.remove",
-                session_id=sid,
-                details={"target": target_email, "removed": False},
-            )
-            db.commit()
-            return jsonify({"ok": True, "removed": False})
 
+@app.route("/api/sessions/<sid>/lists", methods=["POST"])
+def api_upsert_list(sid):
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    names = data.get("names") or []
+    self_ranks = data.get("selfRanks") or {}
+    finalize = bool(data.get("finalize"))
+    slot_count_raw = data.get("slotCount")
+
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    if session.status == "archived":
+        return jsonify({"ok": False, "error": "Session archived"}), 409
+    if session.status == "completed":
+        return jsonify({"ok": False, "error": "Session completed; lists are locked"}), 409
+
+    current_max = session.max_names or 10
+    slot_count = None
+    if slot_count_raw is not None:
         try:
-            db.query(Score).filter(
-                (Score.session_id == sid)
-                & ((Score.list_owner_uid == target_email) | (Score.rater_uid == target_email))
-            ).delete()
-            db.query(ListItem).filter_by(session_id=sid, owner_uid=target_email).delete()
-            db.query(OwnerListState).filter_by(session_id=sid, owner_uid=target_email).delete()
-            db.query(SessionInvite).filter_by(session_id=sid, email=target_email).delete()
-            db.query(Member).filter_by(session_id=sid, uid=target_email).delete()
-            _create_notification(
-                db,
-                user_email=target_email,
-                session_id=sid,
-                type_="removed_from_session",
-                payload={"sid": sid, "title": session.title},
-            )
-            _log_activity(
-                db,
-                actor=owner_email,
-                action="participants.remove",
-                session_id=sid,
-                details={"target": target_email, "removed": True},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to remove participant", exc)
-            return jsonify({"ok": False, "error": "Unable to remove participant"}), 500
+            slot_count = int(slot_count_raw)
+        except (TypeError, ValueError):
+            return jsonify({"ok": False, "error": "slotCount must be an integer"}), 400
+    if slot_count is None or slot_count <= 0:
+        slot_count = current_max
+
+    if session.created_by == email:
+        if slot_count < 4 or slot_count > 100:
+            return jsonify({"ok": False, "error": "List template must be between 4 and 100 names"}), 400
+        focus = session.name_focus or "mix"
+        if focus == "mix" and slot_count % 4 != 0:
+            return jsonify({"ok": False, "error": "For mix sessions, names must be a multiple of 4"}), 400
+        if focus in {"girl", "boy"} and slot_count % 2 != 0:
+            return jsonify({"ok": False, "error": "For single-focus sessions, names must be an even number"}), 400
+        if slot_count != current_max:
+            session.max_names = slot_count
+        session.template_ready = True
+
+    max_names = session.max_names or slot_count or 10
+
+    member = _ensure_member(db, sid, email)
+    editable_roles = {"owner", "voter", "participant"}
+    if not member or member.role not in editable_roles:
+        return jsonify({"ok": False, "error": "Only session participants can save lists"}), 403
+
+    _ensure_owner_list_state(db, sid, email)
+
+    cleaned = []
+    seen_names = set()
+    seen_ranks = set()
+    for idx, name in enumerate(names):
+        trimmed = (name or "").strip()
+        if not trimmed:
+            continue
+        lowered = trimmed.lower()
+        if lowered in seen_names:
+            return jsonify({"ok": False, "error": "Names must be unique"}), 400
+        seen_names.add(lowered)
+        rank_value = self_ranks.get(name)
+        if rank_value is None:
+            rank_value = self_ranks.get(trimmed)
+        if rank_value is None:
+            rank_value = idx + 1
+        try:
+            rank = int(rank_value)
+        except (TypeError, ValueError):
+            rank = idx + 1
+        if rank < 1 or rank > max_names:
+            if finalize:
+                return jsonify({"ok": False, "error": f"Ranks must be 1-{max_names}"}), 400
+        seen_ranks.add(rank)
+        cleaned.append((trimmed, rank))
+
+    if finalize:
+        if len(cleaned) != max_names:
+            return jsonify({"ok": False, "error": f"Exactly {max_names} names required"}), 400
+        # every rank is already known to be within 1..max_names, so max_names
+        # distinct values means the full range is covered
+        if len(seen_ranks) != max_names:
+            return jsonify({"ok": False, "error": f"Ranks must cover 1-{max_names} with no duplicates"}), 400
+    else:
+        cleaned = [
+            (name, max(0, min(rank, max_names)))
+            for name, rank in cleaned
+        ]
 
-        _recompute_session_status(db, sid)
-        return jsonify({"ok": True, "removed": True})
-    finally:
-        db.close()
+    state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=email).first()
+    if not state:
+        state = OwnerListState(session_id=sid, owner_uid=email, status="draft")
+        db.add(state)
+    if state.status == "submitted" and not finalize:
+        return jsonify({"ok": False, "error": "List already submitted"}), 409
+    if state.status == "submitted" and finalize:
+        return jsonify({"ok": False, "error": "List already submitted"}), 409
 
+    notify_targets = []
+    if finalize:
+        notify_targets = _other_member_uids(db, sid, email)
 
-@app.route("/api/sessions/<sid>/lock-invites", methods=["POST"])
-def api_lock_invites(sid):
-    db = SessionLocal()
     try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        if session.created_by != email:
-            return jsonify({"ok": False, "error": "Only the host can lock invites"}), 403
-        if session.invites_locked:
-            return jsonify({"ok": True, "invitesLocked": True})
-
-        session.invites_locked = True
-        for member in db.query(Member).filter_by(session_id=sid).all():
-            if member.uid == email:
-                continue
-            _create_notification(
-                db,
-                user_email=member.uid,
-                session_id=sid,
-                type_="invites_locked",
-                payload={"sid": sid, "title": session.title},
-            )
+        _replace_list_items(db, sid, email, cleaned)
+        state.status = "submitted" if finalize else "draft"
+        state.updated_at = now_utc()
+        state.submitted_at = now_utc() if finalize else None
+        state.slot_count = slot_count if email == session.created_by else max_names
+        if finalize:
+            _prime_name_metadata(db, [name for name, _ in cleaned])
+        _notify_many(
+            db,
+            notify_targets,
+            session_id=sid,
+            type_="list_submitted",
+            payload={"sid": sid, "by": email},
+        )
         _log_activity(
             db,
             actor=email,
-            action="invites.lock",
+            action="list.submit" if finalize else "list.save",
             session_id=sid,
-            details={"title": session.title},
+            details={"nameCount": len(cleaned), "finalize": finalize},
         )
         db.commit()
-        _recompute_session_status(db, sid)
-        return jsonify({"ok": True, "invitesLocked": True})
-    finally:
-        db.close()
-
-
-@app.route("/api/sessions/<sid>/lists", methods=["POST"])
-def api_upsert_list(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        names = data.get("names") or []
-        self_ranks = data.get("selfRanks") or {}
-        finalize = bool(data.get("finalize"))
-        slot_count_raw = data.get("slotCount")
-
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        if session.status == "archived":
-            return jsonify({"ok": False, "error": "Session archived"}), 409
-        if session.status == "completed":
-            return jsonify({"ok": False, "error": "Session completed; lists are locked"}), 409
-
-        current_max = session.max_names or 10
-        slot_count = None
-        if slot_count_raw is not None:
-            try:
-                slot_count = int(slot_count_raw)
-            except (TypeError, ValueError):
-                return jsonify({"ok": False, "error": "slotCount must be an integer"}), 400
-        if slot_count is None or slot_count <= 0:
-            slot_count = current_max
-
-        if session.created_by == email:
-            if slot_count < 4 or slot_count > 100:
-                return jsonify({"ok": False, "error": "List template must be between 4 and 100 names"}), 400
-            focus = session.name_focus or "mix"
-            if focus == "mix" and slot_count % 4 != 0:
-                return jsonify({"ok": False, "error": "For mix sessions, names must be a multiple of 4"}), 400
-            if focus in {"girl", "boy"} and slot_count % 2 != 0:
-                return jsonify({"ok": False, "error": "For single-focus sessions, names must be an even number"}), 400
-            if slot_count != current_max:
-                session.max_names = slot_count
-            session.template_ready = True
-
-        max_names = session.max_names or slot_count or 10
-
-        member = _ensure_member(db, sid, email)
-        editable_roles = {"owner", "voter", "participant"}
-        if not member or member.role not in editable_roles:
-            return jsonify({"ok": False, "error": "Only session participants can save lists"}), 403
-
-        _ensure_owner_list_state(db, sid, email)
-
-        cleaned = []
-        seen_names = set()
-        for idx, name in enumerate(names):
-            trimmed = (name or "").strip()
-            if not trimmed:
-                continue
-            lowered = trimmed.lower()
-            if lowered in seen_names:
-                return jsonify({"ok": False, "error": "Names must be unique"}), 400
-            seen_names.add(lowered)
-            rank_value = self_ranks.get(name)
-            if rank_value is None:
-                rank_value = self_ranks.get(trimmed)
-            if rank_value is None:
-                rank_value = idx + 1
-            try:
-                rank = int(rank_value)
-            except (TypeError, ValueError):
-                rank = idx + 1
-            if rank < 1 or rank > max_names:
-                if finalize:
-                    return jsonify({"ok": False, "error": f"Ranks must be 1-{max_names}"}), 400
-            cleaned.append((trimmed, rank))
-
-        if finalize:
-            if len(cleaned) != max_names:
-                return jsonify({"ok": False, "error": f"Exactly {max_names} names required"}), 400
-            rank_set = {rank for _, rank in cleaned}
-            if len(rank_set) != max_names or rank_set != set(range(1, max_names + 1)):
-                return jsonify({"ok": False, "error": f"Ranks must cover 1-{max_names} with no duplicates"}), 400
-        else:
-            cleaned = [
-                (name, max(0, min(rank, max_names)))
-                for name, rank in cleaned
-            ]
-
-        state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=email).first()
-        if not state:
-            state = OwnerListState(session_id=sid, owner_uid=email, status="draft")
-            db.add(state)
-        if state.status == "submitted" and not finalize:
-            return jsonify({"ok": False, "error": "List already submitted"}), 409
-        if state.status == "submitted" and finalize:
-            return jsonify({"ok": False, "error": "List already submitted"}), 409
-
-        notify_targets = []
-        if finalize:
-            notify_targets = [
-                member.uid
-                for member in db.query(Member).filter_by(session_id=sid).all()
-                if member.uid != email
-            ]
-
-        try:
-            db.query(ListItem).filter_by(session_id=sid, owner_uid=email).delete()
-            for name, rank in cleaned:
-                db.add(ListItem(session_id=sid, owner_uid=email, name=name, self_rank=rank))
-            state.status = "submitted" if finalize else "draft"
-            state.updated_at = now_utc()
-            state.submitted_at = now_utc() if finalize else None
-            state.slot_count = slot_count if email == session.created_by else max_names
-            if finalize:
-                _prime_name_metadata(db, [name for name, _ in cleaned])
-            for target in notify_targets:
-                _create_notification(
-                    db,
-                    user_email=target,
-                    session_id=sid,
-                    type_="list_submitted",
-                    payload={"sid": sid, "by": email},
-                )
-            _log_activity(
-                db,
-                actor=email,
-                action="list.submit" if finalize else "list.save",
-                session_id=sid,
-                details={"nameCount": len(cleaned), "finalize": finalize},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to upsert list", exc)
-            return jsonify({"ok": False, "error": "Unable to save list"}), 500
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to upsert list")
+        return jsonify({"ok": False, "error": "Unable to save list"}), 500
 
-        _recompute_session_status(db, sid)
+    _recompute_session_status(db, sid)
 
-        return jsonify({"ok": True, "status": state.status})
-    finally:
-        db.close()
+    return jsonify({"ok": True, "status": state.status})
 
 
 @app.route("/api/sessions/<sid>/scores", methods=["POST"])
 def api_submit_score(sid):
-    db = SessionLocal()
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    list_owner_uid = _normalize_email(data.get("listOwnerUid"))
+    name = (data.get("name") or "").strip()
+    score_value = data.get("scoreValue")
+
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+    if not list_owner_uid or not name:
+        return jsonify({"ok": False, "error": "Owner and name required"}), 400
     try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        list_owner_uid = _normalize_email(data.get("listOwnerUid"))
-        name = (data.get("name") or "").strip()
-        score_value = data.get("scoreValue")
-
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-        if not list_owner_uid or not name:
-            return jsonify({"ok": False, "error": "Owner and name required"}), 400
-        try:
-            score_value = int(score_value)
-        except (TypeError, ValueError):
-            return jsonify({"ok": False, "error": "Score must be an integer"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-        max_names = session.max_names or 10
-        if score_value < 1 or score_value > max_names:
-            return jsonify({"ok": False, "error": f"Score must be 1-{max_names}"}), 400
-        if session.status == "archived":
-            return jsonify({"ok": False, "error": "Session archived"}), 409
-        if session.status == "completed":
-            return jsonify({"ok": False, "error": "Session completed; voting is closed"}), 409
-        if session.tiebreak_active:
-            return jsonify({"ok": False, "error": "Tie-break in progress; scoring closed"}), 409
-
-        owner_state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=list_owner_uid).first()
-        if not owner_state or owner_state.status != "submitted":
-            return jsonify({"ok": False, "error": "Owner list not submitted"}), 409
-
-        member = _ensure_member(db, sid, email)
-        if not member:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-        if email == list_owner_uid:
-            return jsonify({"ok": False, "error": "Cannot score own list"}), 400
-
-        rater_state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=email).first()
-        if not rater_state or rater_state.status != "submitted":
-            return jsonify({"ok": False, "error": "Submit your list before scoring others"}), 409
-
-        list_names = {
-            row.name
-            for row in db.query(ListItem).filter_by(session_id=sid, owner_uid=list_owner_uid).all()
-        }
-        if name not in list_names:
-            return jsonify({"ok": False, "error": "Name not part of list"}), 400
+        score_value = int(score_value)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "Score must be an integer"}), 400
+
+    owner_items = (ListItem.session_id == sid, ListItem.owner_uid == list_owner_uid)
+    row = db.execute(
+        select(
+            Session,
+            exists().where(*owner_items, ListItem.name == name).label("name_ok"),
+            select(func.count()).where(*owner_items).scalar_subquery().label("list_size"),
+        ).where(Session.id == sid)
+    ).first()
+    if not row:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    session, name_ok, list_size = row
+    max_names = session.max_names or 10
+    if score_value < 1 or score_value > max_names:
+        return jsonify({"ok": False, "error": f"Score must be 1-{max_names}"}), 400
+    if session.status == "archived":
+        return jsonify({"ok": False, "error": "Session archived"}), 409
+    if session.status == "completed":
+        return jsonify({"ok": False, "error": "Session completed; voting is closed"}), 409
+    if session.tiebreak_active:
+        return jsonify({"ok": False, "error": "Tie-break in progress; scoring closed"}), 409
+
+    owner_state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=list_owner_uid).first()
+    if not owner_state or owner_state.status != "submitted":
+        return jsonify({"ok": False, "error": "Owner list not submitted"}), 409
+
+    member = _ensure_member(db, sid, email)
+    if not member:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
+    if email == list_owner_uid:
+        return jsonify({"ok": False, "error": "Cannot score own list"}), 400
+
+    rater_state = db.query(OwnerListState).filter_by(session_id=sid, owner_uid=email).first()
+    if not rater_state or rater_state.status != "submitted":
+        return jsonify({"ok": False, "error": "Submit your list before scoring others"}), 409
+
+    if not name_ok:
+        return jsonify({"ok": False, "error": "Name not part of list"}), 400
+
+    rater_scores = (Score.session_id == sid, Score.list_owner_uid == list_owner_uid, Score.rater_uid == email)
+    rank_taken, rated_count, already_rated = db.execute(
+        select(
+            exists().where(*rater_scores, Score.score_value == score_value, Score.name != name),
+            select(func.count()).where(*rater_scores).scalar_subquery(),
+            exists().where(*rater_scores, Score.name == name),
+        )
+    ).one()
+    if rank_taken:
+        return jsonify({"ok": False, "error": "Each rank can be used only once per list"}), 400
 
-        existing_scores = db.query(Score).filter_by(
+    try:
+        _upsert_score(
+            db,
             session_id=sid,
             list_owner_uid=list_owner_uid,
             rater_uid=email,
-        ).all()
-
-        for existing_score in existing_scores:
-            if existing_score.score_value == score_value and existing_score.name != name:
-                return jsonify({"ok": False, "error": "Each rank can be used only once per list"}), 400
-
-        try:
-            existing = next((row for row in existing_scores if row.name == name), None)
-            if existing:
-                existing.score_value = score_value
-                existing.created_at = now_utc()
-            else:
-                db.add(Score(
-                    session_id=sid,
-                    list_owner_uid=list_owner_uid,
-                    rater_uid=email,
-                    name=name,
-                    score_value=score_value,
-                ))
-            db.flush()
-
-            assigned_scores = db.query(Score).filter_by(
-                session_id=sid,
-                list_owner_uid=list_owner_uid,
-                rater_uid=email,
-            ).all()
-            completed = len(list_names) > 0 and len(assigned_scores) == len(list_names)
-            if completed:
-                _create_notification(
-                    db,
-                    user_email=list_owner_uid,
-                    session_id=sid,
-                    type_="list_scored",
-                    payload={"sid": sid, "by": email},
-                )
-            _log_activity(
+            name=name,
+            score_value=score_value,
+        )
+        # the pre-check already tells us the count after this vote
+        assigned_count = rated_count + (0 if already_rated else 1)
+        completed = list_size > 0 and assigned_count == list_size
+        if completed:
+            _create_notification(
                 db,
-                actor=email,
-                action="score.submit",
+                user_email=list_owner_uid,
                 session_id=sid,
-                details={
-                    "listOwner": list_owner_uid,
-                    "name": name,
-                    "score": score_value,
-                    "completed": completed,
-                },
+                type_="list_scored",
+                payload={"sid": sid, "by": email},
             )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to submit score", exc)
-            return jsonify({"ok": False, "error": "Unable to submit score"}), 500
+        _log_activity(
+            db,
+            actor=email,
+            action="score.submit",
+            session_id=sid,
+            details={
+                "listOwner": list_owner_uid,
+                "name": name,
+                "score": score_value,
+                "completed": completed,
+            },
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to submit score")
+        return jsonify({"ok": False, "error": "Unable to submit score"}), 500
 
+    # a vote that leaves this rater's pass over the list unfinished can't
+    # complete the session, which was active when the vote was accepted
+    if completed:
         _recompute_session_status(db, sid)
 
-        return jsonify({"ok": True})
-    finally:
-        db.close()
+    return jsonify({"ok": True})
 
 
 @app.route("/api/sessions/<sid>/messages", methods=["GET"])
 def api_list_messages(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        request_email = _normalize_email(request.args.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        if not email:
-            return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        member = _ensure_member(db, sid, email)
-        if not member:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-
-        message_rows = (
-            db.query(Message)
-            .filter_by(session_id=sid)
-            .order_by(Message.created_at.desc())
-            .limit(200)
-            .all()
-        )
+    db = get_db()
+    user = _require_user(db)
+    request_email = _normalize_email(request.args.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    if not email:
+        return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
 
-        def _can_view(message: Message) -> bool:
-            if message.recipient_uid is None:
-                return True
-            return message.recipient_uid == email or message.sender_uid == email
+    member = _ensure_member(db, sid, email)
+    if not member:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
 
-        payload = [
-            _serialize_message(row)
-            for row in reversed(message_rows)
-            if _can_view(row)
-        ]
-        return jsonify({"ok": True, "messages": payload})
-    finally:
-        db.close()
+    payload = [_serialize_message(row) for row in _visible_messages(db, sid, email)]
+    return jsonify({"ok": True, "messages": payload})
 
 
 @app.route("/api/sessions/<sid>/messages", methods=["POST"])
 def api_send_message(sid):
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        sender = _normalize_email(user.email)
-        if request_email and request_email != sender:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        recipient = data.get("recipient")
-        if isinstance(recipient, str):
-            recipient = _normalize_email(recipient)
-        else:
-            recipient = None
-        kind = (data.get("kind") or "message").strip().lower()
-        body = (data.get("body") or "").strip()
-
-        if not sender or not _is_valid_email(sender):
-            return jsonify({"ok": False, "error": "Valid sender email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
-
-        member = _ensure_member(db, sid, sender)
-        if not member:
-            return jsonify({"ok": False, "error": "Not a participant"}), 403
-
-        if kind == "nudge":
-            if not recipient:
-                return jsonify({"ok": False, "error": "Nudges require a recipient"}), 400
-            if recipient == sender:
-                return jsonify({"ok": False, "error": "Cannot nudge yourself"}), 400
-            if not body:
-                body = "Please submit your list when you have a moment!"
-        else:
-            if not body:
-                return jsonify({"ok": False, "error": "Message body required"}), 400
-
-        if len(body) > 500:
-            return jsonify({"ok": False, "error": "Message too long"}), 400
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    sender = _normalize_email(user.email)
+    if request_email and request_email != sender:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    recipient = data.get("recipient")
+    if isinstance(recipient, str):
+        recipient = _normalize_email(recipient)
+    else:
+        recipient = None
+    kind = (data.get("kind") or "message").strip().lower()
+    body = (data.get("body") or "").strip()
 
-        if recipient and not _ensure_member(db, sid, recipient):
-            return jsonify({"ok": False, "error": "Recipient is not part of this session"}), 403
+    if not sender or not _is_valid_email(sender):
+        return jsonify({"ok": False, "error": "Valid sender email required"}), 400
 
-        message = Message(
-            session_id=sid,
-            sender_uid=sender,
-            recipient_uid=recipient if recipient else None,
-            body=body,
-            kind=kind,
-        )
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+
+    member = _ensure_member(db, sid, sender)
+    if not member:
+        return jsonify({"ok": False, "error": "Not a participant"}), 403
+
+    if kind == "nudge":
+        if not recipient:
+            return jsonify({"ok": False, "error": "Nudges require a recipient"}), 400
+        if recipient == sender:
+            return jsonify({"ok": False, "error": "Cannot nudge yourself"}), 400
+        if not body:
+            body = "Please submit your list when you have a moment!"
+    else:
+        if not body:
+            return jsonify({"ok": False, "error": "Message body required"}), 400
 
-        notify_targets = []
-        if recipient:
-            notify_targets = [recipient]
-        else:
-            notify_targets = [
-                row.uid
-                for row in db.query(Member).filter_by(session_id=sid).all()
-                if row.uid != sender
-            ]
+    if len(body) > 500:
+        return jsonify({"ok": False, "error": "Message too long"}), 400
 
-        try:
-            db.add(message)
-            for target in notify_targets:
-                _create_notification(
-                    db,
-                    user_email=target,
-                    session_id=sid,
-                    type_="nudge" if kind == "nudge" else "message",
-                    payload={
-                        "sid": sid,
-                        "from": sender,
-                        "kind": kind,
-                        "recipient": recipient,
-                        "direct": bool(recipient),
-                    },
-                )
-            _log_activity(
-                db,
-                actor=sender,
-                action="message.send" if kind != "nudge" else "message.nudge",
-                session_id=sid,
-                details={
-                    "recipient": recipient,
-                    "kind": kind,
-                    "length": len(body),
-                },
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to send message", exc)
-            return jsonify({"ok": False, "error": "Unable to send message"}), 500
+    if recipient and not _is_member(db, sid, recipient):
+        return jsonify({"ok": False, "error": "Recipient is not part of this session"}), 403
 
-        return jsonify({"ok": True, "message": _serialize_message(message)})
-    finally:
-        db.close()
+    message = Message(
+        session_id=sid,
+        sender_uid=sender,
+        recipient_uid=recipient if recipient else None,
+        body=body,
+        kind=kind,
+    )
 
+    notify_targets = []
+    if recipient:
+        notify_targets = [recipient]
+    else:
+        notify_targets = _other_member_uids(db, sid, sender)
 
-@app.route("/api/sessions/<sid>/archive", methods=["POST"])
-def api_archive_session(sid):
-    db = SessionLocal()
     try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
-
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
+        db.add(message)
+        _notify_many(
+            db,
+            notify_targets,
+            session_id=sid,
+            type_="nudge" if kind == "nudge" else "message",
+            payload={
+                "sid": sid,
+                "from": sender,
+                "kind": kind,
+                "recipient": recipient,
+                "direct": bool(recipient),
+            },
+        )
+        _log_activity(
+            db,
+            actor=sender,
+            action="message.send" if kind != "nudge" else "message.nudge",
+            session_id=sid,
+            details={
+                "recipient": recipient,
+                "kind": kind,
+                "length": len(body),
+            },
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to send message")
+        return jsonify({"ok": False, "error": "Unable to send message"}), 500
 
-        member = _ensure_member(db, sid, email)
-        if not member or member.role != "owner":
-            return jsonify({"ok": False, "error": "Only owners can archive"}), 403
+    return jsonify({"ok": True, "message": _serialize_message(message)})
 
-        session.status = "archived"
-        try:
-            _log_activity(
-                db,
-                actor=email,
-                action="session.archive",
-                session_id=sid,
-                details={"title": session.title},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to archive session", exc)
-            return jsonify({"ok": False, "error": "Unable to archive session"}), 500
 
-        return jsonify({"ok": True})
-    finally:
-        db.close()
+@app.route("/api/sessions/<sid>/archive", methods=["POST"])
+def api_archive_session(sid):
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+
+    session = db.get(Session, sid)
+    if not session:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
 
+    if not _is_session_owner(db, sid, email):
+        return jsonify({"ok": False, "error": "Only owners can archive"}), 403
 
-@app.route("/api/sessions/<sid>", methods=["DELETE"])
-def api_delete_session(sid):
-    db = SessionLocal()
+    session.status = "archived"
     try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+        _log_activity(
+            db,
+            actor=email,
+            action="session.archive",
+            session_id=sid,
+            details={"title": session.title},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to archive session")
+        return jsonify({"ok": False, "error": "Unable to archive session"}), 500
 
-        if not email or not _is_valid_email(email):
-            return jsonify({"ok": False, "error": "Valid email required"}), 400
+    return jsonify({"ok": True})
 
-        session = db.query(Session).filter_by(id=sid).first()
-        if not session:
-            return jsonify({"ok": False, "error": "Session not found"}), 404
 
-        member = _ensure_member(db, sid, email)
-        if not member or member.role != "owner":
-            return jsonify({"ok": False, "error": "Only owners can delete"}), 403
+@app.route("/api/sessions/<sid>", methods=["DELETE"])
+def api_delete_session(sid):
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+
+    if not email or not _is_valid_email(email):
+        return jsonify({"ok": False, "error": "Valid email required"}), 400
+
+    # session title and the caller's ownership in one read
+    row = db.execute(
+        select(
+            Session.title,
+            exists().where(Member.session_id == sid, Member.uid == email, Member.role == "owner"),
+        ).where(Session.id == sid)
+    ).first()
+    if not row:
+        return jsonify({"ok": False, "error": "Session not found"}), 404
+    title, is_owner = row
+    if not is_owner:
+        return jsonify({"ok": False, "error": "Only owners can delete"}), 403
 
-        try:
-            db.query(Message).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(Score).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(ListItem).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(SessionInvite).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(OwnerListState).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(Notification).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.query(Member).filter_by(session_id=sid).delete(synchronize_session=False)
-            db.delete(session)
-            _log_activity(
-                db,
-                actor=email,
-                action="session.delete",
-                session_id=sid,
-                details={"title": session.title},
-            )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to delete session", exc)
-            return jsonify({"ok": False, "error": "Unable to delete session"}), 500
+    try:
+        db.query(Message).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(Score).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(ListItem).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(SessionInvite).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(OwnerListState).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(Notification).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(Member).filter_by(session_id=sid).delete(synchronize_session=False)
+        db.query(TieBreakVote).filter_by(session_id=sid).delete(synchronize_session=False)
+        # bulk delete: db.delete() would load every child collection to cascade
+        db.query(Session).filter_by(id=sid).delete(synchronize_session=False)
+        _log_activity(
+            db,
+            actor=email,
+            action="session.delete",
+            session_id=sid,
+            details={"title": title},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to delete session")
+        return jsonify({"ok": False, "error": "Unable to delete session"}), 500
 
-        return jsonify({"ok": True})
-    finally:
-        db.close()
+    return jsonify({"ok": True})
 
 # --- Password reset request endpoint ---
 @app.route("/api/reset-password-request", methods=["POST"])
 def api_reset_password_request():
-    db = SessionLocal()
-    data = request.get_json(force=True) or {}
+    db = get_db()
+    data = _json_body()
     email = (data.get("email") or "").strip().lower()
     if not email:
         return jsonify({"ok": False, "error": "Email required"}), 400
     if not _is_valid_email(email):
         return jsonify({"ok": False, "error": "Invalid email address"}), 400
 
+    with _RESET_REQUEST_COOLDOWN_LOCK:
+        cached = _RESET_REQUEST_COOLDOWN.get(email)
+    if cached is not None:
+        return jsonify(cached), 200
+
+    response = _reset_password_request_response(db, email)
+    with _RESET_REQUEST_COOLDOWN_LOCK:
+        _RESET_REQUEST_COOLDOWN[email] = response
+    return jsonify(response), 200
+
+
+def _reset_password_request_response(db, email: str) -> dict:
     user = db.query(User).filter_by(email=email).first()
     if not user:
         # Don't reveal if email exists
-        return jsonify({"ok": True, "message": "If the email exists, a reset link has been sent."}), 200
+        return {"ok": True, "message": "If the email exists, a reset link has been sent."}
 
     token = _uuid()  # Use existing _uuid function
     expires_at = now_utc() + timedelta(hours=1)
-    reset = ResetToken(user_id=user.id, token=token, expires_at=expires_at)
+    reset = ResetToken(user_id=user.id, token=_hash_token(token), expires_at=expires_at)
     try:
         db.add(reset)
         _log_activity(
@@ -2969,10 +3566,8 @@ def api_reset_password_request():
         reset_link=reset_link,
     )
 
-    email_sent = _send_email(subject=subject, body=body, html_body=html_body, recipient=email)
-
-    if email_sent:
-        return jsonify({"ok": True, "message": "If the email exists, a reset link has been sent."}), 200
+    if _queue_email(subject=subject, body=body, html_body=html_body, recipient=email):
+        return {"ok": True, "message": "If the email exists, a reset link has been sent."}
 
     # Fallback for development/testing when email isn't configured
     response = {
@@ -2982,25 +3577,30 @@ def api_reset_password_request():
     }
     if reset_link:
         response["resetUrl"] = reset_link
-    return jsonify(response), 200
+    return response
 
 # --- Password reset confirmation endpoint ---
 @app.route("/api/reset-password", methods=["POST"])
 def api_reset_password():
-    db = SessionLocal()
-    data = request.get_json(force=True) or {}
+    db = get_db()
+    data = _json_body()
     token = (data.get("token") or "").strip()
     new_password = data.get("newPassword") or ""
 
     if not token or not new_password:
         return jsonify({"ok": False, "error": "Token and new password required"}), 400
 
-    reset = db.query(ResetToken).filter_by(token=token).first()
+    reset = (
+        db.query(ResetToken)
+        .options(joinedload(ResetToken.user))
+        .filter_by(token=_hash_token(token))
+        .first()
+    )
     if not reset or reset.expires_at < now_utc():
         return jsonify({"ok": False, "error": "Invalid or expired token"}), 401
 
     user = reset.user
-    hashed = generate_password_hash(new_password)
+    hashed = _hash_password(new_password)
     try:
         user.password_hash = hashed
         db.delete(reset)  # One-time use
@@ -3015,95 +3615,137 @@ def api_reset_password():
     except Exception:
         db.rollback()
         raise
+    # the replayed response would carry the token just consumed
+    with _RESET_REQUEST_COOLDOWN_LOCK:
+        _RESET_REQUEST_COOLDOWN.pop(_normalize_email(user.email), None)
     return jsonify({"ok": True, "message": "Password reset successfully."}), 200
 
 
 @app.route("/api/notifications", methods=["GET"])
 def api_notifications():
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        request_email = _normalize_email(request.args.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        if not email:
-            return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
-        rows = (
-            db.query(Notification)
-            .filter(
-                Notification.user_email == email,
-                Notification.read_at.is_(None),
-            )
-            .order_by(Notification.created_at.desc())
-            .limit(100)
-            .all()
+    db = get_db()
+    user = _require_user(db)
+    request_email = _normalize_email(request.args.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    if not email:
+        return jsonify({"ok": False, "error": "Authenticated user missing email"}), 400
+    # plain column rows: the feed is read-only, so skip ORM hydration
+    rows = db.execute(
+        select(
+            Notification.id,
+            Notification.session_id,
+            Notification.type,
+            Notification.payload,
+            Notification.read_at,
+            Notification.created_at,
         )
-        return jsonify({
-            "ok": True,
-            "notifications": [_serialize_notification(row) for row in rows],
-        })
-    finally:
-        db.close()
+        .where(
+            Notification.user_email == email,
+            Notification.read_at.is_(None),
+        )
+        .order_by(Notification.created_at.desc())
+        .limit(100)
+    ).all()
+    return jsonify({
+        "ok": True,
+        "notifications": [_serialize_notification(row) for row in rows],
+    })
+
+
+MARK_READ_MAX_IDS = 10000
+MARK_READ_BATCH_SIZE = 1000
 
 
 @app.route("/api/notifications/mark-read", methods=["POST"])
 def api_notifications_mark_read():
-    db = SessionLocal()
-    try:
-        user = _require_user(db)
-        data = request.get_json(force=True) or {}
-        request_email = _normalize_email(data.get("email"))
-        email = _normalize_email(user.email)
-        if request_email and request_email != email:
-            return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
-        ids = data.get("ids") or []
+    db = get_db()
+    user = _require_user(db)
+    data = _json_body()
+    request_email = _normalize_email(data.get("email"))
+    email = _normalize_email(user.email)
+    if request_email and request_email != email:
+        return jsonify({"ok": False, "error": "Authenticated email mismatch"}), 403
+    ids = data.get("ids") or []
 
-        if not email:
-            return jsonify({"ok": False, "error": "Email required"}), 400
-        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
-            return jsonify({"ok": False, "error": "ids must be an array of integers"}), 400
+    if not email:
+        return jsonify({"ok": False, "error": "Email required"}), 400
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return jsonify({"ok": False, "error": "ids must be an array of integers"}), 400
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MARK_READ_MAX_IDS:
+        return jsonify({"ok": False, "error": f"At most {MARK_READ_MAX_IDS} ids per request"}), 400
+    if not ids:
+        return jsonify({"ok": True})
 
-        try:
-            (
-                db.query(Notification)
-                .filter(Notification.user_email == email, Notification.id.in_(ids))
-                .delete(synchronize_session=False)
-            )
-            _log_activity(
-                db,
-                actor=email,
-                action="notifications.mark_read",
-                details={"count": len(ids)},
+    try:
+        # bounded IN lists keep the statement size and plan predictable
+        read_at = now_utc()
+        for start in range(0, len(ids), MARK_READ_BATCH_SIZE):
+            db.execute(
+                update(Notification)
+                .where(
+                    Notification.user_email == email,
+                    Notification.id.in_(ids[start:start + MARK_READ_BATCH_SIZE]),
+                    Notification.read_at.is_(None),
+                )
+                .values(read_at=read_at)
+                .execution_options(synchronize_session=False)
             )
-            db.commit()
-        except Exception as exc:
-            db.rollback()
-            print("Failed to mark notifications", exc)
-            return jsonify({"ok": False, "error": "Unable to update notifications"}), 500
+        _log_activity(
+            db,
+            actor=email,
+            action="notifications.mark_read",
+            details={"count": len(ids)},
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        app.logger.exception("Failed to mark notifications")
+        return jsonify({"ok": False, "error": "Unable to update notifications"}), 500
 
-        return jsonify({"ok": True})
-    finally:
-        db.close()
+    return jsonify({"ok": True})
 
 # ----------------------------------------------------------------------------
 # Static hosting (built app in /dist)
 # ----------------------------------------------------------------------------
 
+def _send_dist_file(path: str):
+    """Send a dist/ file, preferring a precompressed sibling the client accepts."""
+    variants = [(suffix, encoding) for suffix, encoding in _PRECOMPRESSED_VARIANTS if path + suffix in _DIST_FILES]
+    for suffix, encoding in variants:
+        # quality, not mere presence: "gzip;q=0" is an explicit refusal
+        if request.accept_encodings[encoding] > 0:
+            mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            response = send_from_directory(DIST_DIR, path + suffix, mimetype=mimetype)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_from_directory(DIST_DIR, path)
+    if variants:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def spa(path):
     # Only handle non-API routes
     if path.startswith("api/"):
-        return jsonify({"error": "Not found"}), 404
-    if os.path.isdir(DIST_DIR):
-        full = os.path.join(DIST_DIR, path)
-        if os.path.exists(full) and not os.path.isdir(full):
-            return send_from_directory(DIST_DIR, os.path.relpath(full, DIST_DIR))
-        # Let the SPA handle unknown client routes
-        index_path = os.path.join(DIST_DIR, "index.html")
-        if os.path.exists(index_path):
-            return send_from_directory(DIST_DIR, "index.html")
+        abort(404)
+    if path in _DIST_FILES and path != "index.html":
+        response = _send_dist_file(path)
+        if path.startswith("assets/"):
+            response.headers["Cache-Control"] = _IMMUTABLE_CACHE_CONTROL
+        return response
+    # Let the SPA handle unknown client routes
+    if _INDEX_HTML is not None:
+        response = app.response_class(_INDEX_HTML, mimetype="text/html")
+        # index.html points at the current hashed bundle, so always revalidate
+        response.headers["Cache-Control"] = "no-cache"
+        response.set_etag(_INDEX_ETAG)
+        return response.make_conditional(request)
     return "Build not found. Run Vite build to populate /dist.", 200
 
 # ----------------------------------------------------------------------------
@@ -3120,7 +3762,6 @@ if __name__ == "__main__":
         load_dotenv(".env.local", override=True)
     except Exception:
         pass
-    print("DEBUG: entering __main__ block")
     Base.metadata.create_all(engine)
     host = os.getenv("FLASK_HOST", "0.0.0.0")
     port = int(os.getenv("FLASK_PORT", "5050"))
@@ -158,10 +158,8 @@ const FactButton = ({ fact }) => {
   const [position, setPosition] = useState({ top: 0, left: 0 });
   const anchorRef = useRef(null);
   const tooltipRef = useRef(null);
-  const hasFact = Boolean(fact && (fact.info || fact.audioBase64));
-  const audioUrl = fact?.audioBase64
-    ? `data:${fact.audioMime || "audio/mpeg"};base64,${fact.audioBase64}`
-    : null;
+  const hasFact = Boolean(fact && (fact.info || fact.audioUrl));
+  const audioUrl = fact?.audioUrl ? api.apiUrl(fact.audioUrl) : null;
 
   const handleToggle = () => {
     setOpen((prev) => !prev);
@@ -8,6 +8,10 @@ const BASE_URL = import.meta.env.VITE_API_BASE ?? runtimeOrigin ?? "http://127.0
 
 let authToken = null;
 
+export function apiUrl(path) {
+  return `${BASE_URL}${path}`;
+}
+
 export function setAuthToken(token) {
   authToken = token || null;
 }
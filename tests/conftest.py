@@ -11,7 +11,7 @@ if str(ROOT_DIR) not in sys.path:
 os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
 os.environ.setdefault("ALLOWED_ORIGIN", "http://localhost:5173")
 
-from app import app, Base, engine, SessionLocal  # noqa: E402  Imported after env vars are set
+from app import app, Base, engine, SessionLocal, _NAME_METADATA_CACHE, _RESET_REQUEST_COOLDOWN  # noqa: E402  Imported after env vars are set
 
 
 @pytest.fixture(name="client")
@@ -24,5 +24,7 @@ def client_fixture():
 def _reset_database():
     Base.metadata.drop_all(engine)
     Base.metadata.create_all(engine)
+    _NAME_METADATA_CACHE.clear()
+    _RESET_REQUEST_COOLDOWN.clear()
     yield
     SessionLocal.remove()
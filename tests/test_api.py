@@ -1,3 +1,7 @@
+import time
+
+from cachetools import TTLCache
+
 
 def signup_user(client, email, *, password="Secret123", full_name="Tester"):
     resp = client.post(
@@ -19,8 +23,28 @@ def test_api_endpoint_returns_success(client):
     assert response.get_json() == {"message": "Flask backend is working!"}
 
 
+def test_api_preflight_is_answered_without_dispatch(client):
+    response = client.options(
+        "/api/sessions",
+        headers={"Origin": "http://localhost:5173", "Access-Control-Request-Method": "POST"},
+    )
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
+    assert "POST" in response.headers["Access-Control-Allow-Methods"]
+    assert "Authorization" in response.headers["Access-Control-Allow-Headers"]
+
+
+def test_api_responses_carry_cors_origin_only_for_allowed_origins(client):
+    allowed = client.get("/api/test", headers={"Origin": "http://localhost:5173"})
+    assert allowed.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
+    assert "Origin" in allowed.headers["Vary"]
+
+    other = client.get("/api/test", headers={"Origin": "https://evil.example"})
+    assert "Access-Control-Allow-Origin" not in other.headers
+
+
 def test_invite_info_endpoint_returns_session_metadata(client, monkeypatch):
-    monkeypatch.setattr("app._send_email", lambda **_: True)
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
 
     owner_email = "owner@example.com"
     invite_email = "invitee@example.com"
@@ -105,6 +129,33 @@ def test_password_reset_flow(client):
     assert login_resp.status_code == 200
 
 
+def test_repeated_reset_requests_reuse_the_first_token(client):
+    email = "repeat@example.com"
+    signup_user(client, email)
+
+    first = client.post("/api/reset-password-request", json={"email": email}).get_json()
+    second = client.post("/api/reset-password-request", json={"email": email}).get_json()
+    assert second["token"] == first["token"]
+
+    from app import ResetToken, SessionLocal
+
+    db = SessionLocal()
+    try:
+        assert db.query(ResetToken).count() == 1
+    finally:
+        db.close()
+
+
+def test_reset_email_html_contains_reset_link():
+    from app import _render_reset_email_html
+
+    link = "https://example.com/reset?token=abc&mode=reset"
+    html = _render_reset_email_html(first_name="Ava", reset_link=link)
+    assert f'href="{link}"' in html
+    assert "Ava" in html
+    assert "<!DOCTYPE html>" in _render_reset_email_html(first_name="Ava", reset_link=None)
+
+
 def test_reset_request_handles_unknown_email_gracefully(client):
     response = client.post("/api/reset-password-request", json={"email": "nobody@example.com"})
     assert response.status_code == 200
@@ -130,7 +181,7 @@ def test_inviting_new_participant_sends_email_and_tracks_pending_invite(client,
         )
         return True
 
-    monkeypatch.setattr("app._send_email", fake_send_email)
+    monkeypatch.setattr("app._queue_email", fake_send_email)
 
     owner_email = "owner@example.com"
     invitee_email = "guest@example.com"
@@ -205,7 +256,7 @@ def test_inviting_existing_user_sends_notification_email(client, monkeypatch):
         sent_messages.append({"recipient": recipient, "subject": subject, "body": body})
         return True
 
-    monkeypatch.setattr("app._send_email", fake_send_email)
+    monkeypatch.setattr("app._queue_email", fake_send_email)
 
     participant_email = "participant@example.com"
     owner_email = "owner@example.com"
@@ -267,7 +318,7 @@ def test_inviting_existing_user_sends_notification_email(client, monkeypatch):
 
 
 def test_joined_participant_receives_required_names_metadata(client, monkeypatch):
-    monkeypatch.setattr("app._send_email", lambda **_: True)
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
 
     owner_email = "owner@example.com"
     joiner_email = "joiner@example.com"
@@ -343,7 +394,7 @@ def test_inviting_before_template_ready_is_blocked(client):
 
 
 def test_tiebreak_flow_selects_single_winner(client, monkeypatch):
-    monkeypatch.setattr("app._send_email", lambda **_: True)
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
 
     owner_email = "owner@example.com"
     owner_token, _ = signup_user(client, owner_email, full_name="Owner")
@@ -434,7 +485,7 @@ def test_tiebreak_flow_selects_single_winner(client, monkeypatch):
 
 
 def test_tiebreak_close_without_votes_keeps_co_winners(client, monkeypatch):
-    monkeypatch.setattr("app._send_email", lambda **_: True)
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
 
     owner_email = "owner@example.com"
     owner_token, _ = signup_user(client, owner_email, full_name="Owner")
@@ -507,3 +558,435 @@ def test_tiebreak_close_without_votes_keeps_co_winners(client, monkeypatch):
     assert doc["status"] == "completed"
     assert set(doc["finalWinners"]) == {"Ava", "Mia"}
     assert doc["tieBreak"]["active"] is False
+
+
+def test_resaving_draft_list_replaces_previous_names(client):
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    create_resp = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Drafts", "requiredNames": 4, "nameFocus": "girl"},
+    )
+    assert create_resp.status_code == 200
+    sid = create_resp.get_json()["session"]["sid"]
+
+    first = client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "names": ["Ava", "Mia", "Luna"], "selfRanks": {"Ava": 1, "Mia": 2, "Luna": 3}, "slotCount": 4},
+    )
+    assert first.status_code == 200
+    second = client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "names": ["Mia", "Ava", "Zara"], "selfRanks": {"Mia": 1, "Ava": 2, "Zara": 3}, "slotCount": 4},
+    )
+    assert second.status_code == 200
+
+    view = client.get(f"/api/sessions/{sid}", headers=auth_headers(owner_token))
+    owner_list = view.get_json()["lists"][owner_email]
+    assert owner_list["names"] == ["Mia", "Ava", "Zara"]
+    assert owner_list["selfRanks"] == {"Mia": 1, "Ava": 2, "Zara": 3}
+
+
+def test_only_owner_can_archive_session(client):
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    other_token, _ = signup_user(client, "other@example.com", full_name="Other")
+    create_resp = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Archive me", "requiredNames": 4, "nameFocus": "girl"},
+    )
+    sid = create_resp.get_json()["session"]["sid"]
+
+    denied = client.post(f"/api/sessions/{sid}/archive", headers=auth_headers(other_token), json={})
+    assert denied.status_code == 403
+
+    archived = client.post(f"/api/sessions/{sid}/archive", headers=auth_headers(owner_token), json={})
+    assert archived.status_code == 200
+    listing = client.get("/api/sessions", headers=auth_headers(owner_token)).get_json()
+    assert [row["sid"] for row in listing["archived"]] == [sid]
+
+
+def test_submit_score_validates_names_and_ranks(client, monkeypatch):
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
+
+    owner_email = "owner@example.com"
+    rater_email = "rater@example.com"
+    rater_token, _ = signup_user(client, rater_email, full_name="Rater")
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    sid = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Scores", "requiredNames": 4, "nameFocus": "girl"},
+    ).get_json()["session"]["sid"]
+
+    owner_names = ["Ava", "Mia", "Luna", "Zara"]
+    resp = client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={
+            "names": owner_names,
+            "selfRanks": {n: i + 1 for i, n in enumerate(owner_names)},
+            "finalize": True,
+            "slotCount": 4,
+        },
+    )
+    assert resp.status_code == 200
+    resp = client.post(
+        f"/api/sessions/{sid}/participants",
+        headers=auth_headers(owner_token),
+        json={"participants": [rater_email]},
+    )
+    assert resp.get_json()["results"][0]["status"] == "added"
+    rater_names = ["Nora", "Ivy", "Ella", "Rose"]
+    resp = client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(rater_token),
+        json={"names": rater_names, "selfRanks": {n: i + 1 for i, n in enumerate(rater_names)}, "finalize": True},
+    )
+    assert resp.status_code == 200
+
+    def score(name, value):
+        return client.post(
+            f"/api/sessions/{sid}/scores",
+            headers=auth_headers(rater_token),
+            json={"listOwnerUid": owner_email, "name": name, "scoreValue": value},
+        )
+
+    assert score("Nobody", 1).status_code == 400
+    assert score("Ava", 1).status_code == 200
+    duplicate = score("Mia", 1)
+    assert duplicate.status_code == 400
+    assert "only once" in duplicate.get_json()["error"]
+    assert score("Ava", 2).status_code == 200
+    for name, value in (("Mia", 1), ("Luna", 3), ("Zara", 4)):
+        assert score(name, value).status_code == 200
+
+    from app import Notification, SessionLocal
+
+    db = SessionLocal()
+    try:
+        scored = db.query(Notification).filter_by(user_email=owner_email, type="list_scored").count()
+        assert scored == 1
+    finally:
+        db.close()
+
+
+def test_finalizing_list_rejects_duplicate_ranks(client):
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    sid = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Ranks", "requiredNames": 4, "nameFocus": "girl"},
+    ).get_json()["session"]["sid"]
+
+    resp = client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={
+            "names": ["Ava", "Mia", "Luna", "Zara"],
+            "selfRanks": {"Ava": 1, "Mia": 1, "Luna": 3, "Zara": 4},
+            "finalize": True,
+            "slotCount": 4,
+        },
+    )
+    assert resp.status_code == 400
+    assert "no duplicates" in resp.get_json()["error"]
+
+
+def test_google_login_reuses_verified_token_claims(client, monkeypatch):
+    project = "demo-project"
+    calls = []
+
+    def fake_verify(token, request_adapter, audience):
+        calls.append(token)
+        return {
+            "iss": f"https://securetoken.google.com/{project}",
+            "aud": project,
+            "email": "google.user@example.com",
+            "name": "Google User",
+            "exp": time.time() + 600,
+        }
+
+    monkeypatch.setattr("app.FIREBASE_PROJECT_ID", project)
+    monkeypatch.setattr("app.google_id_token.verify_firebase_token", fake_verify)
+    monkeypatch.setattr("app._ID_TOKEN_CACHE", TTLCache(maxsize=10, ttl=30))
+
+    for _ in range(2):
+        resp = client.post("/api/google-login", json={"idToken": "id-token-123"})
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+        assert resp.get_json()["user"]["email"] == "google.user@example.com"
+
+    assert calls == ["id-token-123"]
+
+    password_login = client.post(
+        "/api/login",
+        json={"email": "google.user@example.com", "password": "anything"},
+    )
+    assert password_login.status_code == 401
+    assert password_login.get_json()["error"] == "Use Google sign-in"
+
+
+def test_login_upgrades_legacy_password_hash(client):
+    from werkzeug.security import generate_password_hash
+
+    from app import SessionLocal, User
+
+    db = SessionLocal()
+    db.add(User(
+        email="legacy@example.com",
+        display_name="Legacy",
+        password_hash=generate_password_hash("Secret123"),
+    ))
+    db.commit()
+    db.close()
+
+    bad = client.post("/api/login", json={"email": "legacy@example.com", "password": "wrong"})
+    assert bad.status_code == 401
+    resp = client.post("/api/login", json={"email": "legacy@example.com", "password": "Secret123"})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    db = SessionLocal()
+    stored = db.query(User).filter_by(email="legacy@example.com").one().password_hash
+    db.close()
+    assert stored.startswith("$2b$")
+
+    again = client.post("/api/login", json={"email": "legacy@example.com", "password": "Secret123"})
+    assert again.status_code == 200
+
+
+def test_direct_messages_are_only_listed_for_sender_and_recipient(client, monkeypatch):
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
+
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    alice_token, _ = signup_user(client, "alice@example.com", full_name="Alice")
+    bob_token, _ = signup_user(client, "bob@example.com", full_name="Bob")
+    sid = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Chat", "requiredNames": 4, "nameFocus": "girl"},
+    ).get_json()["session"]["sid"]
+    names = ["Ava", "Mia", "Luna", "Zara"]
+    client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={"names": names, "selfRanks": {n: i + 1 for i, n in enumerate(names)}, "finalize": True},
+    )
+    resp = client.post(
+        f"/api/sessions/{sid}/participants",
+        headers=auth_headers(owner_token),
+        json={"participants": ["alice@example.com", "bob@example.com"]},
+    )
+    assert resp.status_code == 200
+
+    for payload in ({"body": "Hello all"}, {"body": "Psst", "recipient": "alice@example.com"}):
+        resp = client.post(f"/api/sessions/{sid}/messages", headers=auth_headers(owner_token), json=payload)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    def bodies(token):
+        resp = client.get(f"/api/sessions/{sid}/messages", headers=auth_headers(token))
+        assert resp.status_code == 200
+        return [msg["body"] for msg in resp.get_json()["messages"]]
+
+    assert bodies(owner_token) == ["Hello all", "Psst"]
+    assert bodies(alice_token) == ["Hello all", "Psst"]
+    assert bodies(bob_token) == ["Hello all"]
+    session_view = client.get(f"/api/sessions/{sid}", headers=auth_headers(bob_token)).get_json()
+    assert [msg["body"] for msg in session_view["messages"]] == ["Hello all"]
+
+
+def test_removing_participant_reports_whether_they_were_a_member(client, monkeypatch):
+    monkeypatch.setattr("app._queue_email", lambda **_: True)
+
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    guest_token, _ = signup_user(client, "guest@example.com", full_name="Guest")
+    sid = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Removal", "requiredNames": 4, "nameFocus": "boy"},
+    ).get_json()["session"]["sid"]
+    names = ["Leo", "Max", "Eli", "Kai"]
+    client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={"names": names, "selfRanks": {n: i + 1 for i, n in enumerate(names)}, "finalize": True},
+    )
+    client.post(
+        f"/api/sessions/{sid}/participants",
+        headers=auth_headers(owner_token),
+        json={"participants": ["guest@example.com"]},
+    )
+
+    def remove():
+        return client.delete(
+            f"/api/sessions/{sid}/participants",
+            headers=auth_headers(owner_token),
+            json={"participantEmail": "guest@example.com"},
+        ).get_json()
+
+    assert remove() == {"ok": True, "removed": True}
+    assert remove() == {"ok": True, "removed": False}
+    assert client.get(f"/api/sessions/{sid}", headers=auth_headers(guest_token)).status_code == 403
+
+
+def test_activity_rows_are_written_at_commit_and_dropped_on_rollback(client):
+    from app import ActivityLog, SessionLocal, _log_activity
+
+    db = SessionLocal()
+    try:
+        _log_activity(db, actor="a@example.com", action="test.kept", details={"n": 1})
+        _log_activity(db, actor="a@example.com", action="test.kept", details={"n": 2})
+        db.commit()
+        _log_activity(db, actor="a@example.com", action="test.dropped")
+        db.rollback()
+        db.commit()
+        actions = [row.action for row in db.query(ActivityLog).filter_by(actor_email="a@example.com")]
+        assert actions == ["test.kept", "test.kept"]
+    finally:
+        SessionLocal.remove()
+
+
+def test_delete_session_removes_session_and_children(client):
+    owner_email = "owner@example.com"
+    owner_token, _ = signup_user(client, owner_email, full_name="Owner")
+    sid = client.post(
+        "/api/sessions",
+        headers=auth_headers(owner_token),
+        json={"email": owner_email, "title": "Doomed", "requiredNames": 4, "nameFocus": "girl"},
+    ).get_json()["session"]["sid"]
+    names = ["Ava", "Mia", "Luna", "Zara"]
+    client.post(
+        f"/api/sessions/{sid}/lists",
+        headers=auth_headers(owner_token),
+        json={"names": names, "selfRanks": {n: i + 1 for i, n in enumerate(names)}, "finalize": True},
+    )
+
+    resp = client.delete(f"/api/sessions/{sid}", headers=auth_headers(owner_token), json={})
+    assert resp.get_json() == {"ok": True}
+    assert client.get(f"/api/sessions/{sid}", headers=auth_headers(owner_token)).status_code == 404
+
+    from app import ListItem, Member, SessionLocal
+
+    db = SessionLocal()
+    try:
+        assert db.query(Member).filter_by(session_id=sid).count() == 0
+        assert db.query(ListItem).filter_by(session_id=sid).count() == 0
+    finally:
+        db.close()
+
+
+def test_mark_read_deduplicates_ids(client):
+    email = "reader@example.com"
+    token, _ = signup_user(client, email, full_name="Reader")
+
+    from app import Notification, SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = [Notification(user_email=email, type="test") for _ in range(2)]
+        db.add_all(rows)
+        db.commit()
+        first_id = rows[0].id
+    finally:
+        db.close()
+
+    def mark(ids):
+        return client.post("/api/notifications/mark-read", headers=auth_headers(token), json={"ids": ids})
+
+    assert mark([]).get_json() == {"ok": True}
+    assert mark([first_id, first_id]).get_json() == {"ok": True}
+    remaining = client.get("/api/notifications", headers=auth_headers(token)).get_json()["notifications"]
+    assert len(remaining) == 1
+    assert mark(list(range(20000))).status_code == 400
+
+
+def test_gc_reset_tokens_command_removes_only_expired(client):
+    from datetime import timedelta
+
+    from app import ResetToken, SessionLocal, User, app as flask_app, now_utc
+
+    signup_user(client, "gc@example.com")
+    db = SessionLocal()
+    try:
+        user_id = db.query(User).filter_by(email="gc@example.com").one().id
+        db.add_all([
+            ResetToken(user_id=user_id, token="a" * 64, expires_at=now_utc() - timedelta(minutes=1)),
+            ResetToken(user_id=user_id, token="b" * 64, expires_at=now_utc() + timedelta(hours=1)),
+        ])
+        db.commit()
+    finally:
+        SessionLocal.remove()
+
+    result = flask_app.test_cli_runner().invoke(args=["gc-reset-tokens"])
+    assert "Removed 1 expired" in result.output
+
+    db = SessionLocal()
+    try:
+        assert [row.token for row in db.query(ResetToken)] == ["b" * 64]
+    finally:
+        SessionLocal.remove()
+
+
+def test_name_audio_is_served_from_its_own_url(client):
+    import base64
+
+    from app import NameMetadata, SessionLocal, _get_name_metadata_map
+
+    db = SessionLocal()
+    try:
+        db.add(NameMetadata(
+            name_key="ava",
+            display_name="Ava",
+            info_text="Latin, 'bird'.",
+            audio_base64=base64.b64encode(b"ID3fake").decode(),
+            audio_mime="audio/mpeg",
+        ))
+        db.commit()
+        meta = _get_name_metadata_map(db, ["Ava"])["ava"]
+    finally:
+        SessionLocal.remove()
+
+    assert "audioBase64" not in meta
+    response = client.get(meta["audioUrl"])
+    assert response.status_code == 200
+    assert response.data == b"ID3fake"
+    assert response.mimetype == "audio/mpeg"
+    assert client.get("/api/names/nobody/audio").status_code == 404
+
+
+def test_queued_email_retries_with_backoff(monkeypatch):
+    import app as app_module
+
+    attempts = []
+    sleeps = []
+
+    def flaky_send(**email):
+        attempts.append(email["recipient"])
+        return len(attempts) > 1
+
+    class InlineExecutor:
+        def submit(self, fn, *args, **kwargs):
+            fn(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, "_send_email", flaky_send)
+    monkeypatch.setattr(app_module, "_EMAIL_EXECUTOR", InlineExecutor())
+    monkeypatch.setattr(app_module.time, "sleep", sleeps.append)
+    monkeypatch.setattr(app_module, "EMAIL_SENDER", "no-reply@example.com")
+    monkeypatch.setattr(app_module, "SMTP_HOST", "smtp.example.com")
+
+    queued = app_module._queue_email(subject="Hi", body="Body", recipient="guest@example.com")
+    assert queued is True  # reported to clients as emailSent
+    assert attempts == ["guest@example.com", "guest@example.com"]
+    assert sleeps == [2]
+
+    attempts.clear()
+    monkeypatch.setattr(app_module, "SMTP_HOST", None)
+    monkeypatch.setattr(app_module, "SENDGRID_API_KEY", None)
+    assert app_module._queue_email(subject="Hi", body="Body", recipient="guest@example.com") is False
+    assert attempts == []
@@ -12,3 +12,51 @@ def test_unknown_api_routes_return_404(client):
     assert response.status_code == 404
     body = response.get_data(as_text=True)
     assert "Not Found" in body
+
+
+def test_hashed_assets_are_cached_and_client_routes_fall_back(client, monkeypatch, tmp_path):
+    import app as app_module
+
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-abc123.js").write_text("console.log(1)")
+    (tmp_path / "index.html").write_text("<html></html>")
+    monkeypatch.setattr(app_module, "DIST_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "_DIST_FILES", app_module._list_dist_files(str(tmp_path)))
+    monkeypatch.setattr(app_module, "_INDEX_HTML", b"<html></html>")
+    monkeypatch.setattr(app_module, "_INDEX_ETAG", "v1")
+
+    asset = client.get("/assets/index-abc123.js")
+    assert asset.status_code == 200
+    assert "immutable" in asset.headers["Cache-Control"]
+
+    page = client.get("/sessions/some-client-route")
+    assert page.status_code == 200
+    assert "<html" in page.get_data(as_text=True)
+    assert page.headers["Cache-Control"] == "no-cache"
+    assert client.get("/", headers={"If-None-Match": page.headers["ETag"]}).status_code == 304
+
+
+def test_precompressed_assets_are_served_when_accepted(client, monkeypatch, tmp_path):
+    import gzip
+
+    import app as app_module
+
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "app-abc123.js").write_text("console.log(1)")
+    (tmp_path / "assets" / "app-abc123.js.gz").write_bytes(gzip.compress(b"console.log(1)"))
+    monkeypatch.setattr(app_module, "DIST_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "_DIST_FILES", app_module._list_dist_files(str(tmp_path)))
+
+    compressed = client.get("/assets/app-abc123.js", headers={"Accept-Encoding": "gzip, deflate"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "javascript" in compressed.headers["Content-Type"]
+    assert gzip.decompress(compressed.data) == b"console.log(1)"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+
+    plain = client.get("/assets/app-abc123.js")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == b"console.log(1)"
+
+    refused = client.get("/assets/app-abc123.js", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers
+    assert refused.data == b"console.log(1)"